@@ -8,6 +8,32 @@ class Config:
     group_chat_id: int
     timezone: str
     sheet_id: str
+    db_readers: int = 4
+    db_batch_window_ms: float = 5
+    db_batch_max_size: int = 200
+    driver_cache_size: int = 20000
+    driver_cache_ttl: float = 300
+    archive_keep_days: int = 60
+    pending_drain_concurrency: int = 5
+    rate_global_per_sec: float = 30
+    rate_group_per_min: float = 20
+    rate_private_per_sec: float = 1
+    reminder_concurrency: int = 10
+    album_batching: bool = False
+    album_max_items: int = 10
+    album_delay_ms: float = 1500
+    bot_mode: str = "polling"
+    webhook_url: str = ""
+    webhook_path: str = "/webhook"
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_secret: str = ""
+    webhook_max_connections: int = 40
+    telegram_api_url: str = ""
+    sheets_workers: int = 4
+    sheets_timeout: float = 20
+    sheets_requests_per_min: int = 60
+    sheets_max_retries: int = 5
 
 def load_config() -> Config:
     load_dotenv()
@@ -23,11 +49,74 @@ def load_config() -> Config:
     if not sheet_id:
         raise RuntimeError("SHEET_ID topilmadi (.env tekshiring).")
 
+    db_readers = int(os.getenv("DB_READERS", "4"))
+    db_batch_window_ms = float(os.getenv("DB_BATCH_WINDOW_MS", "5"))
+    db_batch_max_size = int(os.getenv("DB_BATCH_MAX_SIZE", "200"))
+    driver_cache_size = int(os.getenv("DRIVER_CACHE_SIZE", "20000"))
+    driver_cache_ttl = float(os.getenv("DRIVER_CACHE_TTL", "300"))
+    archive_keep_days = int(os.getenv("ARCHIVE_KEEP_DAYS", "60"))
+    pending_drain_concurrency = int(os.getenv("PENDING_DRAIN_CONCURRENCY", "5"))
+    rate_global_per_sec = float(os.getenv("RATE_GLOBAL_PER_SEC", "30"))
+    rate_group_per_min = float(os.getenv("RATE_GROUP_PER_MIN", "20"))
+    rate_private_per_sec = float(os.getenv("RATE_PRIVATE_PER_SEC", "1"))
+    reminder_concurrency = int(os.getenv("REMINDER_CONCURRENCY", "10"))
+    album_batching = os.getenv("ALBUM_BATCHING", "0").strip().lower() in ("1", "true", "yes")
+    album_max_items = int(os.getenv("ALBUM_MAX_ITEMS", "10"))
+    album_delay_ms = float(os.getenv("ALBUM_DELAY_MS", "1500"))
+
+    # polling | webhook
+    bot_mode = os.getenv("BOT_MODE", "polling").strip().lower()
+    if bot_mode not in ("polling", "webhook"):
+        raise RuntimeError("BOT_MODE faqat polling yoki webhook bo'lishi mumkin.")
+    webhook_url = os.getenv("WEBHOOK_URL", "").strip().rstrip("/")
+    webhook_path = os.getenv("WEBHOOK_PATH", "/webhook")
+    webhook_host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    webhook_port = int(os.getenv("WEBHOOK_PORT", "8080"))
+    webhook_secret = os.getenv("WEBHOOK_SECRET", "")
+    if bot_mode == "webhook" and not webhook_secret:
+        raise RuntimeError("WEBHOOK_SECRET topilmadi (webhook rejimi uchun majburiy).")
+    webhook_max_connections = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+    # bo'sh bo'lsa — api.telegram.org; yuklama testida tools/fake_bot_api.py manzili
+    telegram_api_url = os.getenv("TELEGRAM_API_URL", "").strip().rstrip("/")
+
+    sheets_workers = int(os.getenv("SHEETS_WORKERS", "4"))
+    sheets_timeout = float(os.getenv("SHEETS_TIMEOUT", "20"))
+    # Google Sheets: ~60 yozish so'rovi / daqiqa / foydalanuvchi
+    sheets_requests_per_min = int(os.getenv("SHEETS_REQUESTS_PER_MIN", "60"))
+    sheets_max_retries = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+
     return Config(
         bot_token=bot_token,
         group_chat_id=group_chat_id,
         timezone=timezone,
         sheet_id=sheet_id,
+        db_readers=db_readers,
+        db_batch_window_ms=db_batch_window_ms,
+        db_batch_max_size=db_batch_max_size,
+        driver_cache_size=driver_cache_size,
+        driver_cache_ttl=driver_cache_ttl,
+        archive_keep_days=archive_keep_days,
+        pending_drain_concurrency=pending_drain_concurrency,
+        rate_global_per_sec=rate_global_per_sec,
+        rate_group_per_min=rate_group_per_min,
+        rate_private_per_sec=rate_private_per_sec,
+        reminder_concurrency=reminder_concurrency,
+        album_batching=album_batching,
+        album_max_items=album_max_items,
+        album_delay_ms=album_delay_ms,
+        bot_mode=bot_mode,
+        webhook_url=webhook_url,
+        webhook_path=webhook_path,
+        webhook_host=webhook_host,
+        webhook_port=webhook_port,
+        webhook_secret=webhook_secret,
+        webhook_max_connections=webhook_max_connections,
+        telegram_api_url=telegram_api_url,
+        sheets_workers=sheets_workers,
+        sheets_timeout=sheets_timeout,
+        sheets_requests_per_min=sheets_requests_per_min,
+        sheets_max_retries=sheets_max_retries,
     )
 
 def get_admin_ids() -> list[int]:
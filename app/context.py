@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.types import User
+
+from app.config import Config, get_admin_ids
+from app.db.database import get_pool
+from app.db.pool import DbPool
+from app.services.sheets import SheetsConfig
+from app.services.sheets_async import AsyncSheets
+
+
+@dataclass(frozen=True)
+class AppContext:
+    """
+    Ishga tushganda bir marta yig'iladigan, o'zgarmas ilova konteksti.
+    Handlerlarga dp workflow data orqali `ctx` bo'lib, scheduler job'lariga
+    argument bo'lib beriladi (har update'da load_config() qilinmaydi).
+    """
+    config: Config
+    admin_ids: frozenset[int]
+    bot_user: User          # bot.get_me() natijasi
+    sheets: AsyncSheets     # bloklamaydigan Sheets (thread pool)
+    pool: DbPool
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.admin_ids
+
+
+async def build_context(bot: Bot, cfg: Config) -> AppContext:
+    """
+    init_db() dan keyin chaqiriladi.
+    """
+    return AppContext(
+        config=cfg,
+        admin_ids=frozenset(get_admin_ids()),
+        bot_user=await bot.get_me(),
+        sheets=AsyncSheets(
+            SheetsConfig(sheet_id=cfg.sheet_id, timezone=cfg.timezone),
+            max_workers=cfg.sheets_workers,
+            timeout=cfg.sheets_timeout,
+            requests_per_min=cfg.sheets_requests_per_min,
+            max_retries=cfg.sheets_max_retries,
+        ),
+        pool=get_pool(),
+    )
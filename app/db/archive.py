@@ -0,0 +1,178 @@
+import os
+from contextlib import asynccontextmanager
+from datetime import date as date_cls, timedelta
+
+from .models import ARCHIVE_SCHEMA_SQL
+from .pool import DbPool
+
+DAILY_COLS = "telegram_id, date, reason, status, video_count, first_video_at, last_video_at"
+VIDEO_COLS = "id, telegram_id, date, kindergarten_no, video_file_id, sheet_row, submitted_at"
+
+
+def archive_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(db_path), "archive")
+
+
+def archive_path(db_path: str, month: str) -> str:
+    """
+    month: 'YYYY-MM' -> .../archive/archive_YYYY_MM.sqlite3
+    """
+    return os.path.join(archive_dir(db_path), f"archive_{month.replace('-', '_')}.sqlite3")
+
+
+def _schema_name(month: str) -> str:
+    return f"arch_{month.replace('-', '_')}"
+
+
+def _next_month(month: str) -> str:
+    y, m = int(month[:4]), int(month[5:7])
+    return f"{y + m // 12}-{m % 12 + 1:02d}"
+
+
+def months_between(start: str, end: str) -> list[str]:
+    """
+    'YYYY-MM-DD' oralig'idagi barcha oylar ('YYYY-MM'), ikkala chet ham kiradi.
+    """
+    months = []
+    m, last = start[:7], end[:7]
+    while m <= last:
+        months.append(m)
+        m = _next_month(m)
+    return months
+
+
+@asynccontextmanager
+async def attached_archives(db, db_path: str, start: str, end: str):
+    """
+    [start, end] oralig'iga tushadigan arxiv fayllarini ulanishga ATTACH qiladi.
+    Qaytaradi: so'rovda UNION ALL qilinadigan sxemalar ro'yxati (birinchisi 'main').
+    """
+    attached = []
+    try:
+        for month in months_between(start, end):
+            path = archive_path(db_path, month)
+            if not os.path.exists(path):
+                continue
+            name = _schema_name(month)
+            await db.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+            attached.append(name)
+        yield ["main", *attached]
+    finally:
+        for name in attached:
+            await db.execute(f"DETACH DATABASE {name}")
+
+
+async def _move_batch(pool: DbPool, path: str, name: str, sql_steps) -> int:
+    """
+    Arxiv faylini ATTACH qilib, bitta qisqa tranzaksiyada bir batch ko'chiradi.
+    Qaytaradi: ko'chirilgan qatorlar soni.
+    """
+    async with pool.writer(tx=False) as db:
+        await db.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                moved = await sql_steps(db)
+            except BaseException:
+                await db.execute("ROLLBACK")
+                raise
+            await db.execute("COMMIT")
+        finally:
+            await db.execute(f"DETACH DATABASE {name}")
+    return moved
+
+
+async def _archive_month(pool: DbPool, month: str, batch_size: int) -> tuple[int, int]:
+    path = archive_path(pool.path, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    name = _schema_name(month)
+    start, end = f"{month}-01", f"{_next_month(month)}-01"
+
+    async with pool.writer(tx=False) as db:
+        await db.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+        try:
+            await db.executescript(ARCHIVE_SCHEMA_SQL.format(schema=name))
+        finally:
+            await db.execute(f"DETACH DATABASE {name}")
+
+    # 1) Avval kunlik qatorlar: hisoblagichlar hali to'g'ri. Ular hot'dan ketgach,
+    #    videos delete-trigger'i hech narsani yangilamaydi (arzon bo'ladi).
+    async def move_daily(db):
+        cur = await db.execute(
+            "SELECT rowid FROM main.daily_submissions WHERE date >= ? AND date < ? LIMIT ?",
+            (start, end, batch_size),
+        )
+        ids = [r[0] for r in await cur.fetchall()]
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        await db.execute(
+            f"INSERT OR IGNORE INTO {name}.daily_submissions ({DAILY_COLS}) "
+            f"SELECT {DAILY_COLS} FROM main.daily_submissions WHERE rowid IN ({marks})",
+            ids,
+        )
+        await db.execute(f"DELETE FROM main.daily_submissions WHERE rowid IN ({marks})", ids)
+        return len(ids)
+
+    # 2) Keyin videolar (id saqlanadi, qayta ishga tushsa ham dublikat bo'lmaydi)
+    async def move_videos(db):
+        cur = await db.execute(
+            "SELECT id FROM main.videos WHERE date >= ? AND date < ? LIMIT ?",
+            (start, end, batch_size),
+        )
+        ids = [r[0] for r in await cur.fetchall()]
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        await db.execute(
+            f"INSERT OR IGNORE INTO {name}.videos ({VIDEO_COLS}) "
+            f"SELECT {VIDEO_COLS} FROM main.videos WHERE id IN ({marks})",
+            ids,
+        )
+        await db.execute(f"DELETE FROM main.videos WHERE id IN ({marks})", ids)
+        return len(ids)
+
+    daily_moved = videos_moved = 0
+    while n := await _move_batch(pool, path, name, move_daily):
+        daily_moved += n
+    while n := await _move_batch(pool, path, name, move_videos):
+        videos_moved += n
+    return daily_moved, videos_moved
+
+
+async def archive_closed_months(
+    pool: DbPool,
+    keep_days: int = 60,
+    batch_size: int = 500,
+    today: date_cls | None = None,
+) -> dict:
+    """
+    Hot DB'da faqat oxirgi keep_days kunni qoldiradi: to'liq shu chegaradan
+    eski bo'lgan oylar archive_YYYY_MM.sqlite3 fayllariga batch-batch ko'chiriladi.
+    """
+    today = today or date_cls.today()
+    cutoff = today - timedelta(days=keep_days)
+    # faqat to'liq yopilgan oylar: cutoff oyining 1-kunidan oldingilar
+    boundary = cutoff.replace(day=1).isoformat()
+
+    async with pool.reader() as db:
+        cur = await db.execute(
+            """
+            SELECT DISTINCT substr(date, 1, 7) FROM videos WHERE date < ?
+            UNION
+            SELECT DISTINCT substr(date, 1, 7) FROM daily_submissions WHERE date < ?
+            """,
+            (boundary, boundary),
+        )
+        months = sorted(r[0] for r in await cur.fetchall())
+
+    summary = {}
+    for month in months:
+        summary[month] = await _archive_month(pool, month, batch_size)
+
+    if months:
+        # WAL faylini qisqartiramiz (ko'p DELETE'dan keyin)
+        async with pool.writer(tx=False) as db:
+            await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    return summary
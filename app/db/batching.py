@@ -0,0 +1,140 @@
+import asyncio
+
+from .pool import DbPool
+
+
+class WriteCoalescer:
+    """
+    Group-commit: bir vaqtda kelgan yozuvlarni bir necha ms yig'ib,
+    bitta tranzaksiyada (bitta fsync bilan) commit qiladi.
+
+    Batch bitta fsync'ga tushgani uchun faqat batch commit'i synchronous=FULL
+    bilan o'tadi; writer'dan to'g'ridan-to'g'ri o'tadigan boshqa yozuvlar
+    pool'dagi NORMAL'da qoladi.
+
+    Har bir yozuv o'z SAVEPOINT'ida bajariladi: bittasi xato bersa,
+    faqat o'sha chaqiruvchiga xato qaytadi, qolganlari commit bo'ladi.
+    Butun batch yiqilsa (masalan "database is locked") — shu batch'dagilarga
+    xato qaytadi, worker keyingi batch'lar bilan davom etadi.
+    submit() faqat COMMIT tugagandan keyin qaytadi.
+    """
+
+    def __init__(self, pool: DbPool, window_ms: float = 5, max_batch: int = 200):
+        self.pool = pool
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        if not task.done():
+            # navbatdagilarni commit qilib bo'lgach to'xtaymiz
+            self._queue.put_nowait(None)
+        # bekor qilingan task'ning xatosi yopilishni to'xtatmasin
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def submit(self, op):
+        """
+        op: async funksiya (db) -> natija. Natija commit'dan keyin qaytadi.
+        """
+        if self._task is None or self._task.done():
+            raise RuntimeError("WriteCoalescer ishga tushmagan.")
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((op, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        try:
+            while not stopping:
+                item = await self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+
+                deadline = loop.time() + self.window
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    try:
+                        if timeout > 0:
+                            item = await asyncio.wait_for(self._queue.get(), timeout)
+                        else:
+                            item = self._queue.get_nowait()
+                    except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                try:
+                    await self._commit(batch)
+                except Exception as e:
+                    # writer olinmadi / tozalash yiqildi — shu batch xato bilan, loop davom etadi
+                    print("WriteCoalescer batch xato:", f"{type(e).__name__}: {e}")
+                    _fail(batch, e)
+        finally:
+            # task to'xtab qolsa (bekor qilindi), navbatdagilar abadiy kutmasin
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    _fail([item], RuntimeError("WriteCoalescer to'xtadi."))
+
+    async def _commit(self, batch) -> None:
+        done = []
+        async with self.pool.writer(tx=False) as db:
+            try:
+                await db.execute("PRAGMA synchronous=FULL")
+                await db.execute("BEGIN IMMEDIATE")
+                for op, fut in batch:
+                    if fut.done():  # chaqiruvchi bekor qilgan
+                        continue
+                    await db.execute("SAVEPOINT item")
+                    try:
+                        result = await op(db)
+                    except BaseException as e:
+                        if not isinstance(e, Exception) and asyncio.current_task().cancelling():
+                            raise
+                        await db.execute("ROLLBACK TO item")
+                        await db.execute("RELEASE item")
+                        fut.set_exception(e if isinstance(e, Exception) else RuntimeError(repr(e)))
+                        continue
+                    await db.execute("RELEASE item")
+                    done.append((fut, result))
+                await db.execute("COMMIT")
+            except BaseException as e:
+                if db.in_transaction:
+                    await db.execute("ROLLBACK")
+                if isinstance(e, Exception):
+                    _fail(batch, e)
+                    return
+                # worker task'ining o'zi bekor qilindi — chaqiruvchilarga oddiy xato
+                _fail(batch, RuntimeError(f"WriteCoalescer batch to'xtatildi: {e!r}"))
+                if asyncio.current_task().cancelling():
+                    raise
+                return
+            finally:
+                try:
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                except Exception as e:
+                    print("WriteCoalescer synchronous=NORMAL xato:", f"{type(e).__name__}: {e}")
+
+        for fut, result in done:
+            if not fut.done():
+                fut.set_result(result)
+
+
+def _fail(batch, e: BaseException) -> None:
+    for _, fut in batch:
+        if not fut.done():
+            fut.set_exception(e)
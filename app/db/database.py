@@ -1,41 +1,84 @@
-﻿import aiosqlite
-from datetime import datetime
-from .models import SCHEMA_SQL
+﻿from datetime import datetime
+import json
+import random
+import time
+from .models import Driver
+from .pool import DbPool
+from .batching import WriteCoalescer
+from .cache import LruTtlCache, MISSING
+from .archive import attached_archives
+from .migrations import run_migrations
+from app.utils.wakeup import PENDING_WAKEUP, SHEETS_WAKEUP
 
 DB_PATH = "app/db/bot.sqlite3"
 
+# Jarayon bo'yicha yagona pool (init_db ochadi, close_db yopadi)
+_pool: DbPool | None = None
+# Video / sabab / daily-row yozuvlari uchun group-commit
+_coalescer: WriteCoalescer | None = None
+# telegram_id -> Driver | None (upsert/delete'da invalidatsiya qilinadi)
+DRIVER_CACHE = LruTtlCache(maxsize=20000, ttl=300)
+
+# PENDING QUEUE: lease va qayta urinish sozlamalari (soniyalarda)
+PENDING_LEASE_SECONDS = 300
+PENDING_BACKOFF_BASE = 30
+PENDING_BACKOFF_CAP = 3600
+PENDING_MAX_ATTEMPTS = 10
+
+# SHEETS OUTBOX: qayta urinish backoff'i (soniya); urinishlar tugasa — sheets_outbox_dead
+SHEETS_BACKOFF_BASE = 5
+SHEETS_BACKOFF_CAP = 900
+SHEETS_MAX_ATTEMPTS = 12
+
+
+def get_pool() -> DbPool:
+    if _pool is None:
+        raise RuntimeError("DB pool ochilmagan: avval init_db() chaqiring.")
+    return _pool
+
+
+async def _write(op):
+    """
+    Yozuvni group-commit orqali bajaradi (coalescer yo'q bo'lsa — to'g'ridan-to'g'ri).
+    """
+    if _coalescer is not None:
+        return await _coalescer.submit(op)
+    async with get_pool().writer() as db:
+        return await op(db)
+
+
+async def init_db(
+    readers: int = 4,
+    batch_window_ms: float = 5,
+    batch_max_size: int = 200,
+) -> None:
+    global _pool, _coalescer
+    if _pool is None:
+        pool = DbPool(DB_PATH, readers=readers)
+        await pool.open()
 
-async def init_db() -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.executescript(SCHEMA_SQL)
+        # ✅ Sxema: faqat bitta user_version tekshiruvi, kerak bo'lsa migratsiyalar
+        await run_migrations(pool)
 
-        # --- Safe migrations: eski DB bo'lsa ham buzmaydi ---
-        for sql in [
-            "ALTER TABLE users ADD COLUMN phone TEXT",
-            "ALTER TABLE users ADD COLUMN car_plate TEXT",
-        ]:
-            try:
-                await db.execute(sql)
-            except Exception:
-                pass
+        await pool.open_readers()
+        _pool = pool
 
-        # ✅ PENDING QUEUE jadvali (internet sust bo'lsa video shu yerga tushadi)
-        await db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS pending_videos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                kindergarten_no TEXT NOT NULL,
-                video_file_id TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                attempts INTEGER NOT NULL DEFAULT 0,
-                last_error TEXT
-            )
-            """
+    if _coalescer is None:
+        coalescer = WriteCoalescer(
+            get_pool(), window_ms=batch_window_ms, max_batch=batch_max_size
         )
+        await coalescer.start()
+        _coalescer = coalescer
 
-        await db.commit()
+
+async def close_db() -> None:
+    global _pool, _coalescer
+    if _coalescer is not None:
+        await _coalescer.stop()
+        _coalescer = None
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
 
 
 async def upsert_user(
@@ -46,7 +89,7 @@ async def upsert_user(
     car_plate: str,
 ) -> None:
     now = datetime.now().isoformat(timespec="seconds")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().writer() as db:
         await db.execute(
             """
             INSERT INTO users (telegram_id, first_name, last_name, phone, car_plate, registered_at)
@@ -66,14 +109,14 @@ async def upsert_user(
                 now,
             ),
         )
-        await db.commit()
+    DRIVER_CACHE.invalidate(telegram_id)
 
 
 async def get_user(telegram_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().reader() as db:
         cur = await db.execute(
             """
-            SELECT telegram_id, first_name, last_name, phone, car_plate
+            SELECT telegram_id, first_name, last_name, phone, car_plate, active
             FROM users
             WHERE telegram_id=?
             """,
@@ -82,16 +125,115 @@ async def get_user(telegram_id: int):
         return await cur.fetchone()
 
 
-async def get_all_users():
-    async with aiosqlite.connect(DB_PATH) as db:
-        cur = await db.execute(
-            "SELECT telegram_id, first_name, last_name, phone, car_plate FROM users"
+async def get_driver(telegram_id: int) -> Driver | None:
+    """
+    get_user'ning keshlangan, tiplangan varianti (DriverMiddleware ishlatadi).
+    """
+    driver = DRIVER_CACHE.get(telegram_id)
+    if driver is not MISSING:
+        return driver
+
+    row = await get_user(telegram_id)
+    driver = None
+    if row:
+        driver = Driver(
+            telegram_id=row[0],
+            first_name=row[1],
+            last_name=row[2],
+            phone=row[3] or "",
+            car_plate=row[4] or "",
+            active=bool(row[5]),
         )
-        return await cur.fetchall()
+    DRIVER_CACHE.set(telegram_id, driver)
+    return driver
 
 
-async def ensure_daily_row(telegram_id: int, date: str) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+# ✅ Botni bloklagan / chat topilmagan haydovchilar (bitta UPDATE bilan)
+async def deactivate_drivers(telegram_ids) -> None:
+    ids = list(telegram_ids)
+    if not ids:
+        return
+    now = datetime.now().isoformat(timespec="seconds")
+
+    async def op(db):
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            await db.execute(
+                f"""
+                UPDATE users SET active=0, blocked_at=?
+                WHERE active=1 AND telegram_id IN ({",".join("?" * len(chunk))})
+                """,
+                (now, *chunk),
+            )
+
+    await _write(op)
+    for tid in ids:
+        DRIVER_CACHE.invalidate(tid)
+
+
+# ✅ Bloklagan haydovchi botga qayta yozdi
+async def reactivate_driver(telegram_id: int) -> None:
+    async def op(db):
+        await db.execute(
+            "UPDATE users SET active=1, blocked_at=NULL WHERE telegram_id=? AND active=0",
+            (telegram_id,),
+        )
+
+    await _write(op)
+    DRIVER_CACHE.invalidate(telegram_id)
+
+
+async def _outbox_put(db, kind: str, payload: dict, video_id: int | None = None) -> None:
+    now = datetime.now().isoformat(timespec="seconds")
+    if kind == "update":
+        # shu katakchaga hali yuborilmagan eski qiymat bo'lsa — keraksiz, oxirgisi yutadi
+        await db.execute(
+            """
+            DELETE FROM sheets_outbox
+            WHERE video_id = ? AND kind = 'update' AND json_extract(payload, '$.col') = ?
+            """,
+            (video_id, payload["col"]),
+        )
+    await db.execute(
+        """
+        INSERT INTO sheets_outbox (kind, video_id, payload, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        (kind, video_id, json.dumps(payload, ensure_ascii=False, separators=(",", ":")), now),
+    )
+
+
+async def _outbox_reminder_event(
+    db, telegram_id: int, date: str, sheet_event: list | None, sheet_cells: dict | None
+) -> None:
+    """
+    Eslatma javobi: event qatori + bugungi oxirgi video qatoridagi katakchalar
+    ({ustun: qiymat}). Video qatori raqami worker'da aniqlanadi — video
+    append'i hali outbox'da bo'lsa ham yo'qolmaydi.
+    """
+    if sheet_event:
+        await _outbox_put(db, "append", {"row": sheet_event})
+    if not sheet_cells:
+        return
+    cur = await db.execute(
+        "SELECT id FROM videos WHERE telegram_id=? AND date=? ORDER BY id DESC LIMIT 1",
+        (telegram_id, date),
+    )
+    row = await cur.fetchone()
+    if row is None:
+        return
+    for col, value in sheet_cells.items():
+        await _outbox_put(db, "update", {"col": int(col), "value": value}, video_id=row[0])
+
+
+async def ensure_daily_row(
+    telegram_id: int,
+    date: str,
+    *,
+    sheet_event: list | None = None,
+    sheet_cells: dict | None = None,
+) -> None:
+    async def op(db):
         await db.execute(
             """
             INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
@@ -99,11 +241,119 @@ async def ensure_daily_row(telegram_id: int, date: str) -> None:
             """,
             (telegram_id, date),
         )
-        await db.commit()
+        await _outbox_reminder_event(db, telegram_id, date, sheet_event, sheet_cells)
+
+    await _write(op)
+    if sheet_event or sheet_cells:
+        SHEETS_WAKEUP.set()
+
+
+# ✅ Butun parkga bitta so'rov bilan kunlik qator ochish (eslatmalar oldidan)
+async def seed_daily_rows(date: str) -> None:
+    async def op(db):
+        await db.execute(
+            """
+            INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
+            SELECT telegram_id, ?, 'PENDING' FROM users WHERE active=1
+            """,
+            (date,),
+        )
+
+    await _write(op)
+
+
+# ✅ Bugun hali PENDING turgan (video ham, sabab ham yubormagan) haydovchilar
+async def get_pending_driver_ids(date: str, after: int = 0) -> list[int]:
+    """
+    telegram_id tartibida; after — eslatma raundi kursori (shundan kattalari).
+    """
+    async with get_pool().reader() as db:
+        cur = await db.execute(
+            """
+            SELECT d.telegram_id
+            FROM daily_submissions d
+            JOIN users u ON u.telegram_id = d.telegram_id AND u.active=1
+            WHERE d.date=? AND d.status='PENDING' AND d.telegram_id > ?
+            ORDER BY d.telegram_id
+            """,
+            (date, after),
+        )
+        rows = await cur.fetchall()
+        return [r[0] for r in rows]
+
+
+# ✅ REMINDER RUNS: raund boshlash yoki uzilgan joydan davom ettirish
+async def start_reminder_run(date: str, slot: str):
+    """
+    Qaytaradi: (cursor, sent, blocked, failed, finished_at).
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    async with get_pool().writer() as db:
+        await db.execute(
+            """
+            INSERT OR IGNORE INTO reminder_runs (date, slot, started_at)
+            VALUES (?, ?, ?)
+            """,
+            (date, slot, now),
+        )
+        cur = await db.execute(
+            """
+            SELECT cursor, sent, blocked, failed, finished_at
+            FROM reminder_runs WHERE date=? AND slot=?
+            """,
+            (date, slot),
+        )
+        return await cur.fetchone()
+
+
+# ✅ REMINDER RUNS: progress checkpoint (finished=True — raund tugadi)
+async def checkpoint_reminder_run(
+    date: str,
+    slot: str,
+    cursor: int,
+    sent: int,
+    blocked: int,
+    failed: int,
+    finished: bool = False,
+) -> None:
+    finished_at = datetime.now().isoformat(timespec="seconds") if finished else None
+
+    async def op(db):
+        await db.execute(
+            """
+            UPDATE reminder_runs
+            SET cursor=?, sent=?, blocked=?, failed=?, finished_at=?
+            WHERE date=? AND slot=?
+            """,
+            (cursor, sent, blocked, failed, finished_at, date, slot),
+        )
+
+    await _write(op)
+
+
+# ✅ REMINDER RUNS: bugungi tugallanmagan raundlar (restartdan keyin davom ettirish uchun)
+async def get_unfinished_reminder_slots(date: str) -> list[str]:
+    async with get_pool().reader() as db:
+        cur = await db.execute(
+            "SELECT slot FROM reminder_runs WHERE date=? AND finished_at IS NULL ORDER BY slot",
+            (date,),
+        )
+        rows = await cur.fetchall()
+        return [r[0] for r in rows]
 
 
-async def save_reason(telegram_id: int, date: str, reason: str) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+async def save_reason(
+    telegram_id: int,
+    date: str,
+    reason: str,
+    *,
+    sheet_event: list | None = None,
+    sheet_cells: dict | None = None,
+) -> None:
+    """
+    sheet_event / sheet_cells: Sheets yozuvlari (outbox'ga, shu tranzaksiyada).
+    """
+    async def op(db):
         await db.execute(
             """
             INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
@@ -120,7 +370,11 @@ async def save_reason(telegram_id: int, date: str, reason: str) -> None:
             """,
             (reason.strip(), telegram_id, date),
         )
-        await db.commit()
+        await _outbox_reminder_event(db, telegram_id, date, sheet_event, sheet_cells)
+
+    await _write(op)
+    if sheet_event or sheet_cells:
+        SHEETS_WAKEUP.set()
 
 
 async def add_video(
@@ -128,10 +382,16 @@ async def add_video(
     date: str,
     kindergarten_no: str,
     file_id: str,
-    sheet_row: int | None = None,
+    *,
+    sheet_append: list | None = None,
 ) -> None:
+    """
+    sheet_append: Sheets qatori — shu tranzaksiyada outbox'ga tushadi, worker
+    qo'shgach qator raqami videos.sheet_row ga yoziladi.
+    """
     now = datetime.now().isoformat(timespec="seconds")
-    async with aiosqlite.connect(DB_PATH) as db:
+
+    async def op(db):
         await db.execute(
             """
             INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
@@ -140,13 +400,15 @@ async def add_video(
             (telegram_id, date),
         )
 
-        await db.execute(
+        cur = await db.execute(
             """
-            INSERT INTO videos (telegram_id, date, kindergarten_no, video_file_id, sheet_row, submitted_at)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO videos (telegram_id, date, kindergarten_no, video_file_id, submitted_at)
+            VALUES (?, ?, ?, ?, ?)
             """,
-            (telegram_id, date, kindergarten_no.strip(), file_id, sheet_row, now),
+            (telegram_id, date, kindergarten_no.strip(), file_id, now),
         )
+        if sheet_append:
+            await _outbox_put(db, "append", {"row": sheet_append}, video_id=cur.lastrowid)
 
         await db.execute(
             """
@@ -157,95 +419,82 @@ async def add_video(
             (telegram_id, date),
         )
 
-        await db.commit()
+    await _write(op)
+    if sheet_append:
+        SHEETS_WAKEUP.set()
 
 
 async def count_videos_for_user_date(telegram_id: int, date: str) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().reader() as db:
         cur = await db.execute(
-            "SELECT COUNT(1) FROM videos WHERE telegram_id=? AND date=?",
+            "SELECT video_count FROM daily_submissions WHERE telegram_id=? AND date=?",
             (telegram_id, date),
         )
         row = await cur.fetchone()
         return int(row[0]) if row else 0
 
 
-async def get_daily_reason_and_status(telegram_id: int, date: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
+# ✅ Bitta qator: status, sabab va bugungi video soni (trigger hisoblagichi)
+async def get_daily_summary(telegram_id: int, date: str):
+    async with get_pool().reader() as db:
+        cur = await db.execute(
             """
-            INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
-            VALUES (?, ?, 'PENDING')
+            SELECT status, reason, video_count
+            FROM daily_submissions
+            WHERE telegram_id=? AND date=?
             """,
             (telegram_id, date),
         )
-        cur = await db.execute(
-            "SELECT status, reason FROM daily_submissions WHERE telegram_id=? AND date=?",
-            (telegram_id, date),
-        )
-        return await cur.fetchone()
+        row = await cur.fetchone()
+        return row if row else ("PENDING", None, 0)
+
+
+def _daily_union(schemas: list[str], where: str) -> str:
+    """
+    Hot + ulangan arxivlardagi daily_submissions ustidan UNION ALL.
+    """
+    return " UNION ALL ".join(
+        f"SELECT telegram_id, date, reason, status, video_count FROM {s}.daily_submissions WHERE {where}"
+        for s in schemas
+    )
 
 
 async def get_report_rows_for_date(date: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().reader() as db, attached_archives(db, DB_PATH, date, date) as schemas:
         cur = await db.execute(
-            """
+            f"""
             SELECT
                 u.first_name,
                 u.last_name,
-                COALESCE(v.cnt, 0) AS video_count,
+                COALESCE(d.video_count, 0) AS video_count,
                 d.status,
                 d.reason
             FROM users u
-            LEFT JOIN (
-                SELECT telegram_id, date, COUNT(1) AS cnt
-                FROM videos
-                WHERE date=?
-                GROUP BY telegram_id, date
-            ) v ON v.telegram_id = u.telegram_id
-            LEFT JOIN daily_submissions d
-                ON d.telegram_id = u.telegram_id AND d.date=?
+            LEFT JOIN ({_daily_union(schemas, "date=?")}) d
+                ON d.telegram_id = u.telegram_id
+            WHERE u.active=1
             ORDER BY u.last_name, u.first_name
             """,
-            (date, date),
+            (date,) * len(schemas),
         )
         return await cur.fetchall()
 
 
-async def get_last_video_sheet_row(telegram_id: int, date: str) -> int | None:
-    async with aiosqlite.connect(DB_PATH) as db:
-        cur = await db.execute(
-            """
-            SELECT sheet_row
-            FROM videos
-            WHERE telegram_id=? AND date=? AND sheet_row IS NOT NULL
-            ORDER BY id DESC
-            LIMIT 1
-            """,
-            (telegram_id, date),
-        )
-        row = await cur.fetchone()
-        return int(row[0]) if row and row[0] is not None else None
-
-
 # ✅ Bugun (yoki berilgan sana) kim video yuborganini olish
 async def get_senders_for_date(date: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().reader() as db, attached_archives(db, DB_PATH, date, date) as schemas:
         cur = await db.execute(
-            """
+            f"""
             SELECT
                 u.telegram_id,
                 u.first_name,
                 u.last_name,
-                COUNT(v.id) AS video_count
-            FROM videos v
-            JOIN users u ON u.telegram_id = v.telegram_id
-            WHERE v.date = ?
-            GROUP BY u.telegram_id, u.first_name, u.last_name
-            HAVING video_count > 0
-            ORDER BY video_count DESC, u.last_name, u.first_name
+                d.video_count
+            FROM ({_daily_union(schemas, "date = ? AND video_count > 0")}) d
+            JOIN users u ON u.telegram_id = d.telegram_id
+            ORDER BY d.video_count DESC, u.last_name, u.first_name
             """,
-            (date,),
+            (date,) * len(schemas),
         )
         rows = await cur.fetchall()
         return [(r[0], r[1], r[2], int(r[3])) for r in rows]
@@ -257,58 +506,268 @@ async def enqueue_pending_video(
     date: str,
     kindergarten_no: str,
     file_id: str,
+    *,
+    caption: str,
+    parse_mode: str | None,
+    sheet_fields: dict,
     last_error: str = "",
 ) -> None:
+    """
+    Guruh posti uchun kerak bo'lgan hamma narsa (caption, parse_mode,
+    Sheets maydonlari) payload'da saqlanadi: flusher qo'shimcha o'qimaydi.
+    """
     now = datetime.now().isoformat(timespec="seconds")
-    async with aiosqlite.connect(DB_PATH) as db:
+    payload = json.dumps(
+        {"caption": caption, "parse_mode": parse_mode, "sheet": sheet_fields},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    async with get_pool().writer() as db:
         await db.execute(
             """
-            INSERT INTO pending_videos (telegram_id, date, kindergarten_no, video_file_id, created_at, attempts, last_error)
-            VALUES (?, ?, ?, ?, ?, 0, ?)
+            INSERT INTO pending_videos (telegram_id, date, kindergarten_no, video_file_id, created_at, attempts, last_error, payload)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?)
             """,
-            (telegram_id, date, kindergarten_no.strip(), file_id, now, last_error[:500]),
+            (telegram_id, date, kindergarten_no.strip(), file_id, now, last_error[:500], payload),
         )
-        await db.commit()
+    PENDING_WAKEUP.notify()
 
 
-# ✅ PENDING QUEUE: navbatdagilarni olish
-async def get_pending_videos(limit: int = 20):
-    async with aiosqlite.connect(DB_PATH) as db:
+# ✅ PENDING QUEUE: tayyor (vaqti kelgan, lease'i tugagan) qatorlarni egallab olish
+async def claim_pending_videos(limit: int = 20, lease_seconds: float = PENDING_LEASE_SECONDS):
+    now = time.time()
+    async with get_pool().writer() as db:
         cur = await db.execute(
             """
-            SELECT id, telegram_id, date, kindergarten_no, video_file_id, attempts
-            FROM pending_videos
-            ORDER BY id ASC
-            LIMIT ?
+            UPDATE pending_videos
+            SET lease_until = ?
+            WHERE id IN (
+                SELECT id FROM pending_videos
+                WHERE next_attempt_at <= ? AND lease_until <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            )
+            RETURNING id, telegram_id, date, kindergarten_no, video_file_id, attempts, payload
             """,
-            (limit,),
+            (now + lease_seconds, now, now, limit),
         )
-        return await cur.fetchall()
+        rows = await cur.fetchall()
+    return sorted(rows)
+
+
+# ✅ PENDING QUEUE: eng yaqin urinish vaqti (unix), navbat bo'sh bo'lsa None
+async def next_pending_due() -> float | None:
+    async with get_pool().reader() as db:
+        cur = await db.execute("SELECT MIN(MAX(next_attempt_at, lease_until)) FROM pending_videos")
+        (due,) = await cur.fetchone()
+        return due
+
 
+def _backoff_delay(attempts: int, base: float = PENDING_BACKOFF_BASE, cap: float = PENDING_BACKOFF_CAP) -> float:
+    # eksponensial backoff + jitter (delay/2 .. delay)
+    delay = min(cap, base * 2 ** attempts)
+    return delay / 2 + random.uniform(0, delay / 2)
 
-# ✅ PENDING QUEUE: urinish + error
-async def bump_pending_attempt(pending_id: int, err: str) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+
+async def _dead_letter(db, pending_id: int) -> None:
+    now = datetime.now().isoformat(timespec="seconds")
+    await db.execute(
+        """
+        INSERT OR REPLACE INTO pending_videos_dead
+            (id, telegram_id, date, kindergarten_no, video_file_id, created_at, attempts, last_error, payload, dead_at)
+        SELECT id, telegram_id, date, kindergarten_no, video_file_id, created_at, attempts, last_error, payload, ?
+        FROM pending_videos WHERE id = ?
+        """,
+        (now, pending_id),
+    )
+    await db.execute("DELETE FROM pending_videos WHERE id = ?", (pending_id,))
+
+
+# ✅ PENDING QUEUE: muvaffaqiyatsiz urinish -> backoff yoki dead-letter
+async def fail_pending_video(pending_id: int, attempts: int, err: str) -> bool:
+    """
+    attempts: egallangan paytdagi urinishlar soni.
+    Qaytaradi: True — qator dead-letter'ga ko'chdi.
+    """
+    attempts += 1
+    async with get_pool().writer() as db:
         await db.execute(
             """
             UPDATE pending_videos
-            SET attempts = attempts + 1,
-                last_error = ?
+            SET attempts = ?,
+                last_error = ?,
+                next_attempt_at = ?,
+                lease_until = 0
             WHERE id = ?
             """,
+            (attempts, str(err)[:500], time.time() + _backoff_delay(attempts), pending_id),
+        )
+        if attempts >= PENDING_MAX_ATTEMPTS:
+            await _dead_letter(db, pending_id)
+            return True
+    return False
+
+
+# ✅ PENDING QUEUE: qayta urinishdan foyda yo'q (masalan user o'chirilgan)
+async def dead_letter_pending_video(pending_id: int, err: str) -> None:
+    async with get_pool().writer() as db:
+        await db.execute(
+            "UPDATE pending_videos SET last_error = ? WHERE id = ?",
             (str(err)[:500], pending_id),
         )
-        await db.commit()
+        await _dead_letter(db, pending_id)
 
 
 # ✅ PENDING QUEUE: o'chirish (muvaffaqiyatli yuborilganda)
 async def delete_pending_video(pending_id: int) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().writer() as db:
         await db.execute("DELETE FROM pending_videos WHERE id = ?", (pending_id,))
-        await db.commit()
+
+
+# ✅ SHEETS OUTBOX: vaqti kelgan yozuvlar, kelish tartibida (Sheets'dagi tartib ham shu)
+async def get_due_sheets_outbox(limit: int = 200):
+    async with get_pool().reader() as db:
+        cur = await db.execute(
+            """
+            SELECT id, kind, video_id, payload, attempts
+            FROM sheets_outbox
+            WHERE next_attempt_at <= ?
+            ORDER BY +id  -- idx_sheets_outbox_due bo'yicha qidiradi, faqat tayyorlarini saralaydi
+            LIMIT ?
+            """,
+            (time.time(), limit),
+        )
+        return await cur.fetchall()
+
+
+# ✅ SHEETS OUTBOX: eng yaqin urinish vaqti (unix), outbox bo'sh bo'lsa None
+async def next_sheets_outbox_due() -> float | None:
+    async with get_pool().reader() as db:
+        cur = await db.execute("SELECT MIN(next_attempt_at) FROM sheets_outbox")
+        (due,) = await cur.fetchone()
+        return due
+
+
+# ✅ SHEETS OUTBOX: qo'shilgan qatorlar -> videos.sheet_row, outbox'dan o'chirish (bitta tranzaksiya)
+async def complete_sheets_appends(done: list[tuple[int, int | None, int]]) -> None:
+    """
+    done: [(outbox_id, video_id | None, sheet_row), ...]
+    """
+    async with get_pool().writer() as db:
+        await db.executemany(
+            "UPDATE videos SET sheet_row=? WHERE id=?",
+            [(sheet_row, video_id) for _, video_id, sheet_row in done if video_id is not None],
+        )
+        await db.executemany("DELETE FROM sheets_outbox WHERE id=?", [(oid,) for oid, _, _ in done])
+
+
+# ✅ SHEETS OUTBOX: update'lar uchun video qatorlari
+async def get_video_sheet_rows(video_ids) -> dict[int, tuple[int | None, float | None, bool]]:
+    """
+    video_id -> (sheet_row, append'ning next_attempt_at'i (outbox'da bo'lsa),
+    append dead-letter'dami). Video o'chirilgan / arxivlangan bo'lsa lug'atda bo'lmaydi.
+    """
+    ids = list(video_ids)
+    if not ids:
+        return {}
+    marks = ",".join("?" * len(ids))
+    async with get_pool().reader() as db:
+        cur = await db.execute(
+            f"""
+            SELECT v.id, v.sheet_row,
+                   (SELECT MIN(o.next_attempt_at) FROM sheets_outbox o
+                    WHERE o.video_id = v.id AND o.kind = 'append'),
+                   EXISTS (SELECT 1 FROM sheets_outbox_dead d WHERE d.video_id = v.id AND d.kind = 'append')
+            FROM videos v
+            WHERE v.id IN ({marks})
+            """,
+            ids,
+        )
+        return {r[0]: (r[1], r[2], bool(r[3])) for r in await cur.fetchall()}
+
+
+async def delete_sheets_outbox(ids) -> None:
+    ids = list(ids)
+    if not ids:
+        return
+    async with get_pool().writer() as db:
+        await db.executemany("DELETE FROM sheets_outbox WHERE id=?", [(i,) for i in ids])
+
+
+# ✅ SHEETS OUTBOX: video qatori hali Sheets'da yo'q — append'ning o'z urinish vaqtigacha,
+# urinish hisoblanmaydi
+async def defer_sheets_outbox(items: list[tuple[int, float]]) -> None:
+    """
+    items: [(outbox_id, next_attempt_at), ...]
+    """
+    if not items:
+        return
+    async with get_pool().writer() as db:
+        await db.executemany(
+            "UPDATE sheets_outbox SET next_attempt_at=? WHERE id=?",
+            [(until, oid) for oid, until in items],
+        )
+
+
+async def _dead_letter_sheets(db, ids: list[int]) -> None:
+    now = datetime.now().isoformat(timespec="seconds")
+    await db.executemany(
+        """
+        INSERT OR REPLACE INTO sheets_outbox_dead
+            (id, kind, video_id, payload, created_at, attempts, last_error, dead_at)
+        SELECT id, kind, video_id, payload, created_at, attempts, last_error, ?
+        FROM sheets_outbox WHERE id = ?
+        """,
+        [(now, i) for i in ids],
+    )
+    await db.executemany("DELETE FROM sheets_outbox WHERE id = ?", [(i,) for i in ids])
+
+
+# ✅ SHEETS OUTBOX: qayta urinishdan foyda yo'q (masalan video append'i dead-letter'da)
+async def dead_letter_sheets_outbox(ids, err: str) -> None:
+    ids = list(ids)
+    if not ids:
+        return
+    async with get_pool().writer() as db:
+        await db.executemany(
+            "UPDATE sheets_outbox SET last_error = ? WHERE id = ?",
+            [(str(err)[:500], i) for i in ids],
+        )
+        await _dead_letter_sheets(db, ids)
+
+
+# ✅ SHEETS OUTBOX: muvaffaqiyatsiz partiya -> backoff yoki dead-letter
+async def fail_sheets_outbox(rows: list[tuple[int, int]], err: str) -> int:
+    """
+    rows: [(outbox_id, egallangan paytdagi attempts), ...]
+    Qaytaradi: dead-letter'ga ko'chganlar soni.
+    """
+    if not rows:
+        return 0
+    now = time.time()
+    dead = [oid for oid, attempts in rows if attempts + 1 >= SHEETS_MAX_ATTEMPTS]
+    async with get_pool().writer() as db:
+        await db.executemany(
+            """
+            UPDATE sheets_outbox
+            SET attempts = ?, last_error = ?, next_attempt_at = ?
+            WHERE id = ?
+            """,
+            [
+                (
+                    attempts + 1,
+                    str(err)[:500],
+                    now + _backoff_delay(attempts + 1, SHEETS_BACKOFF_BASE, SHEETS_BACKOFF_CAP),
+                    oid,
+                )
+                for oid, attempts in rows
+            ],
+        )
+        await _dead_letter_sheets(db, dead)
+    return len(dead)
 
 
 async def delete_user_by_telegram_id(telegram_id: int) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with get_pool().writer() as db:
         await db.execute("DELETE FROM users WHERE telegram_id = ?", (telegram_id,))
-        await db.commit()
+    DRIVER_CACHE.invalidate(telegram_id)
@@ -0,0 +1,315 @@
+import sqlite3
+
+from .models import SCHEMA_SQL
+from .pool import DbPool
+
+# Katta jadvallarni qayta hisoblashda bitta tranzaksiyadagi qatorlar soni
+CHUNK_ROWS = 5000
+
+
+class Chunked:
+    """
+    Katta jadval ustidagi migratsiya qadami: bo'laklab (har bo'lak alohida
+    qisqa tranzaksiyada) bajariladi, writer lock uzoq ushlanmaydi.
+
+    fn(db, after) -> keyingi kursor yoki None (tugadi). Qadam idempotent
+    bo'lishi shart: yarmida to'xtasa, keyingi ishga tushishda boshidan yuradi.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+async def _execute_script(db, sql: str) -> None:
+    """
+    executescript() o'zi COMMIT qiladi, shuning uchun tranzaksiya ichida
+    statementlarni birma-bir bajaramiz (trigger ichidagi ';' ni hisobga olib).
+    """
+    buf = ""
+    for line in sql.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip().strip(";").strip():
+                await db.execute(buf)
+            buf = ""
+    if buf.strip():
+        await db.execute(buf)
+
+
+async def _columns(db, table: str) -> set[str]:
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    return {r[1] for r in await cur.fetchall()}
+
+
+async def _v1_base(db) -> None:
+    await _execute_script(db, SCHEMA_SQL)
+
+    # eski DB'larda bu ustunlar bo'lmasligi mumkin
+    cols = await _columns(db, "users")
+    for col in ("phone", "car_plate"):
+        if col not in cols:
+            await db.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
+
+
+V2_INDEXES_SQL = """
+-- get_senders_for_date / get_report_rows_for_date: sana bo'yicha, telegram_id bilan covering
+CREATE INDEX IF NOT EXISTS idx_videos_date_user
+ON videos(date, telegram_id);
+
+-- eslatma javobi (_outbox_reminder_event): bugungi oxirgi video id'si.
+-- trg_videos_count_delete ham shu prefiksdan foydalanadi
+CREATE INDEX IF NOT EXISTS idx_videos_user_date_sheet
+ON videos(telegram_id, date, id, sheet_row);
+
+-- eslatma fan-out: bugun PENDING turganlar
+CREATE INDEX IF NOT EXISTS idx_daily_date_status
+ON daily_submissions(date, status);
+
+-- eski indeks yangisining prefiksi, ortiqcha yozuv xarajati
+DROP INDEX IF EXISTS idx_videos_user_date;
+"""
+
+V3_DAILY_COUNTERS_SQL = """
+-- kunlik hisoblagichlar: videos'ni har safar COUNT qilmaslik uchun
+ALTER TABLE daily_submissions ADD COLUMN video_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE daily_submissions ADD COLUMN first_video_at TEXT;
+ALTER TABLE daily_submissions ADD COLUMN last_video_at TEXT;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_count_insert
+AFTER INSERT ON videos
+BEGIN
+    INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
+    VALUES (NEW.telegram_id, NEW.date, 'PENDING');
+
+    UPDATE daily_submissions
+    SET video_count = video_count + 1,
+        first_video_at = CASE
+            WHEN first_video_at IS NULL OR NEW.submitted_at < first_video_at
+            THEN NEW.submitted_at ELSE first_video_at END,
+        last_video_at = CASE
+            WHEN last_video_at IS NULL OR NEW.submitted_at > last_video_at
+            THEN NEW.submitted_at ELSE last_video_at END
+    WHERE telegram_id = NEW.telegram_id AND date = NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_count_delete
+AFTER DELETE ON videos
+BEGIN
+    UPDATE daily_submissions
+    SET video_count = MAX(video_count - 1, 0),
+        first_video_at = (
+            SELECT MIN(submitted_at) FROM videos
+            WHERE telegram_id = OLD.telegram_id AND date = OLD.date
+        ),
+        last_video_at = (
+            SELECT MAX(submitted_at) FROM videos
+            WHERE telegram_id = OLD.telegram_id AND date = OLD.date
+        )
+    WHERE telegram_id = OLD.telegram_id AND date = OLD.date;
+END;
+"""
+
+
+async def _next_bound(db, table: str, key: str, after: int) -> int | None:
+    cur = await db.execute(
+        f"SELECT MAX({key}) FROM (SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?)",
+        (after, CHUNK_ROWS),
+    )
+    (hi,) = await cur.fetchone()
+    return hi
+
+
+async def _v4_daily_rows_for_videos(db, after: int) -> int | None:
+    # video bor, lekin kunlik qator yo'q bo'lgan (eski) kunlar
+    hi = await _next_bound(db, "videos", "id", after)
+    if hi is None:
+        return None
+    await db.execute(
+        """
+        INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
+        SELECT DISTINCT telegram_id, date, 'SUBMITTED' FROM videos
+        WHERE id > ? AND id <= ?
+        """,
+        (after, hi),
+    )
+    return hi
+
+
+async def _v5_backfill_daily_counters(db, after: int) -> int | None:
+    hi = await _next_bound(db, "daily_submissions", "rowid", after)
+    if hi is None:
+        return None
+    await db.execute(
+        """
+        UPDATE daily_submissions
+        SET (video_count, first_video_at, last_video_at) = (
+            SELECT COUNT(1), MIN(v.submitted_at), MAX(v.submitted_at)
+            FROM videos v
+            WHERE v.telegram_id = daily_submissions.telegram_id
+              AND v.date = daily_submissions.date
+        )
+        WHERE rowid > ? AND rowid <= ?
+        """,
+        (after, hi),
+    )
+    return hi
+
+
+V6_PENDING_LEASES_SQL = """
+-- pending_videos: lease + backoff bilan navbat
+ALTER TABLE pending_videos ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0;  -- unix vaqt
+ALTER TABLE pending_videos ADD COLUMN lease_until REAL NOT NULL DEFAULT 0;      -- unix vaqt
+
+CREATE INDEX IF NOT EXISTS idx_pending_ready
+ON pending_videos(next_attempt_at, lease_until);
+
+-- urinishlari tugaganlar o'chirilmaydi, shu yerga ko'chadi
+CREATE TABLE IF NOT EXISTS pending_videos_dead (
+    id INTEGER PRIMARY KEY,
+    telegram_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    kindergarten_no TEXT NOT NULL,
+    video_file_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    dead_at TEXT NOT NULL
+);
+"""
+
+
+V7_PENDING_PAYLOAD_SQL = """
+-- navbat qatori o'zi yetarli: tayyor caption, parse_mode va Sheets maydonlari (JSON)
+ALTER TABLE pending_videos ADD COLUMN payload TEXT;
+ALTER TABLE pending_videos_dead ADD COLUMN payload TEXT;
+"""
+
+
+V8_REMINDER_RUNS_SQL = """
+-- eslatma raundlari: uzilib qolsa, kursordan davom ettiriladi
+CREATE TABLE IF NOT EXISTS reminder_runs (
+    date TEXT NOT NULL,                  -- YYYY-MM-DD
+    slot TEXT NOT NULL,                  -- "10:00", "15:00", ...
+    cursor INTEGER NOT NULL DEFAULT 0,   -- shu telegram_id gacha (o'zi ham) ishlangan
+    sent INTEGER NOT NULL DEFAULT 0,
+    blocked INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    PRIMARY KEY (date, slot)
+);
+"""
+
+
+V9_USERS_ACTIVE_SQL = """
+-- botni bloklagan haydovchilar: fan-out va hisobotlardan chiqadi, yozsa qaytadi
+ALTER TABLE users ADD COLUMN active INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE users ADD COLUMN blocked_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_users_active
+ON users(telegram_id) WHERE active = 1;
+"""
+
+
+V10_SHEETS_OUTBOX_SQL = """
+-- Sheets'ga yoziladigan narsalar: handler bilan bir tranzaksiyada yoziladi,
+-- fon worker'i partiyalab Google'ga chiqaradi
+CREATE TABLE IF NOT EXISTS sheets_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,                      -- 'append' | 'update'
+    video_id INTEGER,                        -- append: natija videos.sheet_row ga; update: shu video qatori
+    payload TEXT NOT NULL,                   -- append: {"row": [...]}; update: {"col": 9, "value": "..."}
+    created_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0, -- unix time
+    last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_sheets_outbox_due
+ON sheets_outbox(next_attempt_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_sheets_outbox_video
+ON sheets_outbox(video_id) WHERE video_id IS NOT NULL;
+"""
+
+
+V11_SHEETS_OUTBOX_DEAD_SQL = """
+-- urinishlari tugagan Sheets yozuvlari o'chirilmaydi, shu yerga ko'chadi
+CREATE TABLE IF NOT EXISTS sheets_outbox_dead (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    video_id INTEGER,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    dead_at TEXT NOT NULL
+);
+
+-- update: video append'i shu yerda bo'lsa, update ham shu yerga
+CREATE INDEX IF NOT EXISTS idx_sheets_outbox_dead_video
+ON sheets_outbox_dead(video_id) WHERE video_id IS NOT NULL;
+"""
+
+
+# ✅ Raqamlangan migratsiyalar: har biri PRAGMA user_version bo'yicha bir marta
+MIGRATIONS = [
+    (1, _v1_base),
+    (2, V2_INDEXES_SQL),
+    (3, V3_DAILY_COUNTERS_SQL),
+    (4, Chunked(_v4_daily_rows_for_videos)),
+    (5, Chunked(_v5_backfill_daily_counters)),
+    (6, V6_PENDING_LEASES_SQL),
+    (7, V7_PENDING_PAYLOAD_SQL),
+    (8, V8_REMINDER_RUNS_SQL),
+    (9, V9_USERS_ACTIVE_SQL),
+    (10, V10_SHEETS_OUTBOX_SQL),
+    (11, V11_SHEETS_OUTBOX_DEAD_SQL),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Bir martalik, faylda saqlanib qoladigan PRAGMA'lar (yangi DB uchun)
+ONE_TIME_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+)
+
+
+async def _user_version(db) -> int:
+    cur = await db.execute("PRAGMA user_version")
+    (version,) = await cur.fetchone()
+    return int(version)
+
+
+async def _run_step(pool: DbPool, version: int, step) -> None:
+    if isinstance(step, Chunked):
+        cursor = 0
+        while cursor is not None:
+            # har bo'lak alohida: orada boshqa yozuvlar ham o'ta oladi
+            async with pool.writer() as db:
+                cursor = await step.fn(db, cursor)
+        async with pool.writer() as db:
+            await db.execute(f"PRAGMA user_version={version}")
+        return
+
+    async with pool.writer() as db:
+        if isinstance(step, str):
+            await _execute_script(db, step)
+        else:
+            await step(db)
+        await db.execute(f"PRAGMA user_version={version}")
+
+
+async def run_migrations(pool: DbPool) -> None:
+    async with pool.writer(tx=False) as db:
+        version = await _user_version(db)
+        if version >= LATEST_VERSION:
+            return
+        if version == 0:
+            for pragma in ONE_TIME_PRAGMAS:
+                await db.execute(pragma)
+
+    for target, step in MIGRATIONS:
+        if target > version:
+            await _run_step(pool, target, step)
+            print(f"DB migratsiya: v{target}")
@@ -1,6 +1,21 @@
-SCHEMA_SQL = """
-PRAGMA journal_mode=WAL;
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Driver:
+    """
+    users jadvalidagi bitta haydovchi (handlerlarga middleware orqali beriladi).
+    """
+    telegram_id: int
+    first_name: str
+    last_name: str
+    phone: str
+    car_plate: str
+    active: bool = True
 
+
+# ✅ v1: bazaviy sxema (migrations.py birinchi qadami)
+SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS users (
     telegram_id INTEGER PRIMARY KEY,
     first_name TEXT NOT NULL,
@@ -30,6 +45,48 @@ CREATE TABLE IF NOT EXISTS videos (
     FOREIGN KEY (telegram_id) REFERENCES users(telegram_id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_videos_user_date
-ON videos(telegram_id, date);
+-- ✅ PENDING QUEUE jadvali (internet sust bo'lsa video shu yerga tushadi)
+CREATE TABLE IF NOT EXISTS pending_videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    kindergarten_no TEXT NOT NULL,
+    video_file_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+# ✅ Oylik arxiv fayllari sxemasi ({schema} — ATTACH nomi)
+ARCHIVE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS {schema}.daily_submissions (
+    telegram_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    reason TEXT,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    video_count INTEGER NOT NULL DEFAULT 0,
+    first_video_at TEXT,
+    last_video_at TEXT,
+    UNIQUE(telegram_id, date)
+);
+
+CREATE INDEX IF NOT EXISTS {schema}.idx_daily_date_status
+ON daily_submissions(date, status);
+
+CREATE TABLE IF NOT EXISTS {schema}.videos (
+    id INTEGER PRIMARY KEY,
+    telegram_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    kindergarten_no TEXT NOT NULL,
+    video_file_id TEXT NOT NULL,
+    sheet_row INTEGER,
+    submitted_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS {schema}.idx_videos_date_user
+ON videos(date, telegram_id);
+
+CREATE INDEX IF NOT EXISTS {schema}.idx_videos_user_date_sheet
+ON videos(telegram_id, date, id, sheet_row);
 """
@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+# Har bir ulanish ochilganda bir marta beriladigan PRAGMA'lar
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",     # WAL bilan xavfsiz, har commit'da fsync qilmaydi
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache (manfiy = KiB)
+    "PRAGMA mmap_size=268435456",    # 256 MB mmap
+    "PRAGMA busy_timeout=5000",      # lock bo'lsa 5s kutadi, darhol xato bermaydi
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class DbPool:
+    """
+    Butun jarayon uchun bitta SQLite pool:
+      - 1 ta writer ulanish (yozuvlar navbat bilan, lock orqali)
+      - N ta reader ulanish (WAL rejimida parallel o'qiydi)
+    Ulanishlar init_db() da ochiladi va close_db() da yopiladi.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self.readers_count = max(1, readers)
+        self._writer: aiosqlite.Connection | None = None
+        self._write_lock = asyncio.Lock()
+        self._readers: list[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+
+    async def _connect(self, *, read_only: bool) -> aiosqlite.Connection:
+        # isolation_level=None: tranzaksiyalarni o'zimiz BEGIN/COMMIT bilan boshqaramiz
+        conn = await aiosqlite.connect(self.path, isolation_level=None)
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        if read_only:
+            await conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    async def open(self) -> None:
+        """
+        Faqat writer'ni ochadi. journal_mode kabi PRAGMA'lar boshqa ulanishlar
+        ochiq bo'lsa o'zgarmaydi, shuning uchun reader'lar migratsiyadan keyin
+        open_readers() bilan ochiladi.
+        """
+        self._writer = await self._connect(read_only=False)
+
+    async def open_readers(self) -> None:
+        for _ in range(self.readers_count):
+            conn = await self._connect(read_only=True)
+            self._readers.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        self._idle = asyncio.Queue()
+
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def reader(self):
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self, tx: bool = True):
+        """
+        Writer ulanishni beradi. tx=True bo'lsa blok bitta tranzaksiya:
+        xato bo'lsa ROLLBACK, bo'lmasa COMMIT.
+        """
+        if self._writer is None:
+            raise RuntimeError("DB pool ochilmagan: avval init_db() chaqiring.")
+
+        async with self._write_lock:
+            if not tx:
+                yield self._writer
+                return
+
+            await self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.execute("ROLLBACK")
+                raise
+            await self._writer.execute("COMMIT")
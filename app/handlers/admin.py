@@ -4,20 +4,19 @@ from aiogram.filters import Command, CommandObject
 from aiogram.filters.state import StateFilter
 from aiogram.fsm.context import FSMContext
 
-from app.config import get_admin_ids
-from app.db.database import delete_user_by_telegram_id
+from app.context import AppContext
+from app.db.database import delete_user_by_telegram_id, DRIVER_CACHE
+from app.services.ratelimit import OUTBOUND_LIMITER
+from app.services.album import GROUP_ALBUMS
+from app.services.sheets_outbox import SHEETS_OUTBOX_STATS
 
 router = Router()
 
 
-def is_admin(user_id: int) -> bool:
-    return user_id in get_admin_ids()
-
-
 @router.message(StateFilter("*"), Command("delete"))
-async def delete_user_cmd(message: Message, state: FSMContext, command: CommandObject):
+async def delete_user_cmd(message: Message, state: FSMContext, command: CommandObject, ctx: AppContext):
     # Admin bo'lmasa
-    if not is_admin(message.from_user.id):
+    if not ctx.is_admin(message.from_user.id):
         await message.answer("❌ Siz admin emassiz.")
         return
 
@@ -53,3 +52,35 @@ async def delete_user_cmd(message: Message, state: FSMContext, command: CommandO
         pass
 
     await message.answer(f"✅ Foydalanuvchi o‘chirildi: {target_id}")
+
+
+@router.message(StateFilter("*"), Command("stats"))
+async def stats_cmd(message: Message, ctx: AppContext):
+    if not ctx.is_admin(message.from_user.id):
+        await message.answer("❌ Siz admin emassiz.")
+        return
+
+    c = DRIVER_CACHE.stats()
+    r = OUTBOUND_LIMITER.stats()
+    sh = SHEETS_OUTBOX_STATS
+    q = ctx.sheets.quota.stats()
+    lanes = "\n".join(
+        f"{name}: {l['requests']} ta, kutgan {l['throttled']}, "
+        f"o'rtacha {l['wait_avg']}s, max {l['wait_max']}s, navbatda {l['waiting']}"
+        for name, l in r["lanes"].items()
+    )
+    await message.answer(
+        "📈 Driver kesh:\n"
+        f"Hajm: {c['size']} / {c['maxsize']}\n"
+        f"Hit: {c['hits']} | Miss: {c['misses']} | Hit ratio: {c['hit_ratio']}\n\n"
+        "🚦 Chiquvchi xabarlar:\n"
+        f"{lanes}\n"
+        f"429 RetryAfter: {r['retry_after']}\n"
+        f"Albomlar: {GROUP_ALBUMS.albums} ta ({GROUP_ALBUMS.items} video)\n\n"
+        "📊 Sheets outbox:\n"
+        f"So'rovlar: {sh['requests']} | Qatorlar: {sh['rows']} | "
+        f"Katakchalar: {sh['cells']} (birlashtirilgan {sh['coalesced']}) | Dead: {sh['dead']}\n"
+        f"Byudjet: {q['used']} / {q['limit']} (oxirgi daqiqa) | Jami: {q['requests']}\n"
+        f"Kutgan: {q['throttled']} ({q['throttle_wait']}s) | "
+        f"Qayta urinish: {q['retries']} {q['errors'] or ''}"
+    )
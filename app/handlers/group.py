@@ -1,6 +1,8 @@
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 
+from app.context import AppContext
+
 router = Router()
 
 
@@ -18,10 +20,8 @@ def join_bot_kb(bot_username: str) -> InlineKeyboardMarkup:
 
 
 @router.message(F.new_chat_members)
-async def new_member_handler(message: Message):
-    bot = message.bot
-    me = await bot.get_me()
-    bot_username = me.username
+async def new_member_handler(message: Message, ctx: AppContext):
+    bot_username = ctx.bot_user.username
 
     for member in message.new_chat_members:
         # Botning o'zi qo'shilsa — o'tkazib yuboramiz
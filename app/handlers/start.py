@@ -4,7 +4,8 @@ from aiogram.fsm.context import FSMContext
 
 from app.keyboards.common import onboarding_kb, main_menu, contact_kb
 from app.utils.states import RegisterFlow
-from app.db.database import get_user, upsert_user
+from app.db.models import Driver
+from app.db.database import upsert_user
 
 router = Router()
 
@@ -22,9 +23,8 @@ TUTORIAL_TEXT = (
 
 
 @router.message(F.text == "/start")
-async def cmd_start(message: Message, state: FSMContext):
-    user = await get_user(message.from_user.id)
-    if user:
+async def cmd_start(message: Message, state: FSMContext, driver: Driver | None):
+    if driver:
         await state.clear()
         await message.answer("Bosh menyu:", reply_markup=main_menu())
         return
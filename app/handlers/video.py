@@ -7,16 +7,14 @@ from aiogram.fsm.context import FSMContext
 
 from app.keyboards.common import main_menu
 from app.utils.states import VideoFlow
+from app.db.models import Driver
 from app.db.database import (
-    get_user,
-    ensure_daily_row,
     add_video,
-    count_videos_for_user_date,
-    get_daily_reason_and_status,
+    get_daily_summary,
     enqueue_pending_video,  # ✅ queue bo'lsa
 )
-from app.config import load_config
-from app.services.sheets import SheetsConfig, append_video_row
+from app.context import AppContext
+from app.services.album import GROUP_ALBUMS
 
 router = Router()
 
@@ -49,9 +47,8 @@ def extract_destination_text(message: Message) -> str | None:
 
 
 @router.message(F.text == "🎥 Video yuborish")
-async def start_video(message: Message, state: FSMContext):
-    user = await get_user(message.from_user.id)
-    if not user:
+async def start_video(message: Message, state: FSMContext, driver: Driver | None):
+    if not driver:
         await message.answer("Avval /start orqali ro'yxatdan o'ting.")
         return
 
@@ -66,9 +63,8 @@ async def start_video(message: Message, state: FSMContext):
 
 
 @router.message(VideoFlow.waiting_video, F.video)
-async def handle_video(message: Message, state: FSMContext):
-    user = await get_user(message.from_user.id)
-    if not user:
+async def handle_video(message: Message, state: FSMContext, driver: Driver | None, ctx: AppContext):
+    if not driver:
         await message.answer("Avval /start orqali ro'yxatdan o'ting.")
         await state.clear()
         return
@@ -83,15 +79,14 @@ async def handle_video(message: Message, state: FSMContext):
         )
         return
 
-    cfg = load_config()
+    cfg = ctx.config
     date = today_str()
     file_id = message.video.file_id
 
-    # user = (telegram_id, first_name, last_name, phone, car_plate)
-    first_name = user[1]
-    last_name = user[2]
-    phone = user[3] or ""
-    car_plate = user[4] or ""
+    first_name = driver.first_name
+    last_name = driver.last_name
+    phone = driver.phone
+    car_plate = driver.car_plate
 
     tg = message.from_user
     tg_id = tg.id
@@ -119,29 +114,37 @@ async def handle_video(message: Message, state: FSMContext):
         f"🕒 Vaqt: {stamp}"
     )
 
+    # Sheets qatori maydonlari (video_link'dan tashqari) — navbatga ham aynan shular ketadi
+    sheet_fields = {
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone": phone,
+        "car_plate": car_plate,
+        "date_str": date,
+        "kindergarten_no": destination,  # Sheets ustuni eski nomda qolsa ham qiymat destination bo'ladi
+    }
+
     # 1) Guruhga yuborishga urinamiz
     try:
-        sent = await message.bot.send_video(
-            chat_id=cfg.group_chat_id,
+        sent = await GROUP_ALBUMS.send_video(
+            message.bot,
+            cfg.group_chat_id,
             video=file_id,
             caption=caption,
             parse_mode="HTML",
         )
     except Exception as e:
         # ✅ internet sust bo'lsa queue
+        # caption va Sheets maydonlari tayyor holda saqlanadi — navbatdan ham aynan shunday chiqadi
         await enqueue_pending_video(
             telegram_id=message.from_user.id,
             date=date,
             kindergarten_no=destination,  # eski nomi qolgan bo'lsa ham shu yerga destination ketadi
-            video_file_id=file_id,
+            file_id=file_id,
             caption=caption,
-            first_name=first_name,
-            last_name=last_name,
-            phone=phone,
-            car_plate=car_plate,
-            tg_id=tg_id,
-            tg_username=tg_username,
-            error=f"{type(e).__name__}: {e}",
+            parse_mode="HTML",
+            sheet_fields=sheet_fields,
+            last_error=f"{type(e).__name__}: {e}",
         )
 
         await message.answer(
@@ -160,30 +163,13 @@ async def handle_video(message: Message, state: FSMContext):
         internal_id = internal_id.lstrip("-")
     video_link = f"https://t.me/c/{internal_id}/{sent.message_id}"
 
-    # 3) Sheets
-    sheet_row = None
-    try:
-        sheets_cfg = SheetsConfig(sheet_id=cfg.sheet_id)
-        sheet_row = append_video_row(
-            sheets_cfg,
-            first_name=first_name,
-            last_name=last_name,
-            phone=phone,
-            car_plate=car_plate,
-            date_str=date,
-            kindergarten_no=destination,  # Sheets ustuni eski nomda qolsa ham qiymat destination bo'ladi
-            video_link=video_link,
-        )
-    except Exception as e:
-        await message.answer(f"❌ Google Sheets xato: {e}")
-
-    # 4) DB
+    # 3) DB + Sheets outbox (bitta tranzaksiya; Sheets'ga fon worker'i yozadi)
     await add_video(
         message.from_user.id,
         date,
         destination,  # DBda ham shu joyga yoziladi
         file_id,
-        sheet_row=sheet_row,
+        sheet_append=ctx.sheets.video_row(**sheet_fields, video_link=video_link),
     )
 
     await message.answer("✅ Video qabul qilindi va guruhga yuborildi.", reply_markup=main_menu())
@@ -199,18 +185,13 @@ async def waiting_video_wrong(message: Message):
 
 
 @router.message(F.text == "📄 Bugungi holatim")
-async def today_status(message: Message):
-    user = await get_user(message.from_user.id)
-    if not user:
+async def today_status(message: Message, driver: Driver | None):
+    if not driver:
         await message.answer("Avval /start orqali ro'yxatdan o'ting.")
         return
 
     date = today_str()
-    await ensure_daily_row(message.from_user.id, date)
-
-    count = await count_videos_for_user_date(message.from_user.id, date)
-    status_reason = await get_daily_reason_and_status(message.from_user.id, date)
-    _, reason = status_reason if status_reason else ("PENDING", None)
+    _, reason, count = await get_daily_summary(message.from_user.id, date)
 
     text = (
         f"📄 Bugungi holat ({date})\n"
@@ -0,0 +1,32 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.db.database import get_driver, reactivate_driver
+
+
+class DriverMiddleware(BaseMiddleware):
+    """
+    Har update uchun haydovchini bir marta (kesh orqali) topadi va
+    handlerlarga `driver: Driver | None` sifatida beradi.
+    Nofaol (botni bloklagan) haydovchi qayta yozsa — yana faol qilinadi.
+    dp.update.outer_middleware(...) ga ulanadi.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        driver = await get_driver(user.id) if user else None
+
+        # my_chat_member (bloklash hodisasining o'zi) hisobga olinmaydi
+        if driver and not driver.active and (event.message or event.callback_query):
+            await reactivate_driver(driver.telegram_id)
+            driver = await get_driver(driver.telegram_id)
+
+        data["driver"] = driver
+        return await handler(event, data)
@@ -0,0 +1,69 @@
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.services.blocked import BLOCKED_DRIVERS, is_chat_unreachable
+from app.services.ratelimit import OUTBOUND_LIMITER
+from app.utils.wakeup import PENDING_WAKEUP
+
+
+class OnlineSignalMiddleware(BaseRequestMiddleware):
+    """
+    Bot API so'rovi muvaffaqiyatli o'tsa — tarmoq bor: flusher xatolar sababli
+    backoff'da bo'lsa, navbatdagi videolarni kutmasdan yuborish uchun uyg'otamiz.
+    bot.session.middleware(...) ga ulanadi.
+    """
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot, method):
+        response = await make_request(bot, method)
+        PENDING_WAKEUP.notify_online()
+        return response
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Chatga yuboriladigan har bir so'rov (send_message, send_video, ...)
+    OUTBOUND_LIMITER orqali o'tadi: global + har chat bucket, ustuvor navbatlar.
+    429 RetryAfter kelsa — limiter to'xtatiladi (guruh chatida faqat shu chat,
+    shaxsiy chatda global) va so'rov qayta yuboriladi.
+    getUpdates, getMe kabi chat_id'siz so'rovlar cheklanmaydi.
+    """
+
+    def __init__(self, max_retries: int = 3):
+        self.max_retries = max_retries
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if not isinstance(chat_id, int):
+            return await make_request(bot, method)
+
+        retries = 0
+        while True:
+            await OUTBOUND_LIMITER.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                OUTBOUND_LIMITER.pause(e.retry_after, chat_id=chat_id if chat_id < 0 else None)
+                retries += 1
+                if retries > self.max_retries:
+                    raise
+                print(f"Flood control: {e.retry_after}s kutamiz (chat {chat_id})")
+
+
+class BlockedChatMiddleware(BaseRequestMiddleware):
+    """
+    Shaxsiy chatga yuborishda Forbidden / "chat not found" kelsa —
+    haydovchi BLOCKED_DRIVERS orqali (batch bilan) nofaol qilinadi.
+    Xato chaqiruvchiga o'zgarmasdan qaytadi.
+    """
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot, method):
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            chat_id = getattr(method, "chat_id", None)
+            if isinstance(chat_id, int) and chat_id > 0 and is_chat_unreachable(e):
+                BLOCKED_DRIVERS.add(chat_id)
+            raise
@@ -0,0 +1,99 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import InputMediaVideo
+
+
+class AlbumBatcher:
+    """
+    Guruhga ketadigan videolarni sendMediaGroup albomiga yig'adi (ixtiyoriy rejim):
+      - max_items (<= 10) to'lsa yoki birinchi videodan delay soniya o'tsa yuboriladi
+      - har video o'z caption'i bilan; chaqiruvchi o'z Message'ini oladi
+        (message_id -> Sheets uchun havola)
+      - albom yiqilsa (429 dan boshqa xato), har video alohida send_video bilan
+        qayta yuboriladi: bitta buzuq file_id qolganlarini yiqitmaydi
+    O'chiq bo'lsa — oddiy bot.send_video.
+    """
+
+    def __init__(self, enabled: bool = False, max_items: int = 10, delay: float = 1.5):
+        self.configure(enabled=enabled, max_items=max_items, delay=delay)
+        # chat_id -> (bot, [(kwargs, future), ...])
+        self._buffers: dict[int, tuple] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self.albums = 0
+        self.items = 0
+
+    def configure(self, *, enabled: bool, max_items: int, delay: float) -> None:
+        self.enabled = enabled
+        # Telegram albomi 2..10 element
+        self.max_items = min(10, max(2, max_items))
+        self.delay = max(0.0, delay)
+
+    async def send_video(self, bot, chat_id: int, video: str, caption: str, parse_mode: str | None = None):
+        if not self.enabled:
+            return await bot.send_video(
+                chat_id=chat_id, video=video, caption=caption, parse_mode=parse_mode
+            )
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        _bot, items = self._buffers.setdefault(chat_id, (bot, []))
+        items.append(({"video": video, "caption": caption, "parse_mode": parse_mode}, fut))
+
+        if len(items) >= self.max_items:
+            self._flush(chat_id)
+        elif len(items) == 1:
+            self._timers[chat_id] = loop.call_later(self.delay, self._flush, chat_id)
+        return await fut
+
+    def _flush(self, chat_id: int) -> None:
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        entry = self._buffers.pop(chat_id, None)
+        if entry:
+            bot, items = entry
+            asyncio.create_task(self._send(bot, chat_id, items))
+
+    async def _send(self, bot, chat_id: int, items: list) -> None:
+        try:
+            if len(items) == 1:
+                # bitta video albom bo'lolmaydi
+                messages = [await bot.send_video(chat_id=chat_id, **items[0][0])]
+            else:
+                messages = await bot.send_media_group(
+                    chat_id=chat_id,
+                    media=[
+                        InputMediaVideo(media=kw["video"], caption=kw["caption"], parse_mode=kw["parse_mode"])
+                        for kw, _ in items
+                    ],
+                )
+        except Exception as e:
+            if len(items) > 1 and not isinstance(e, TelegramRetryAfter):
+                await self._send_one_by_one(bot, chat_id, items)
+                return
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        self.albums += 1
+        self.items += len(items)
+        for (_, fut), message in zip(items, messages):
+            if not fut.done():
+                fut.set_result(message)
+
+    async def _send_one_by_one(self, bot, chat_id: int, items: list) -> None:
+        # har chaqiruvchi o'z natijasini / o'z xatosini oladi
+        for kw, fut in items:
+            try:
+                message = await bot.send_video(chat_id=chat_id, **kw)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+                continue
+            if not fut.done():
+                fut.set_result(message)
+
+
+GROUP_ALBUMS = AlbumBatcher()
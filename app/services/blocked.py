@@ -0,0 +1,54 @@
+import asyncio
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from app.db.database import deactivate_drivers
+
+
+def is_chat_unreachable(e: Exception) -> bool:
+    """
+    Haydovchiga endi yozib bo'lmaydi: botni bloklagan, akkaunt o'chirilgan
+    yoki chat topilmadi.
+    """
+    if isinstance(e, TelegramForbiddenError):
+        return True
+    return isinstance(e, TelegramBadRequest) and "chat not found" in str(e).lower()
+
+
+class BlockedDrivers:
+    """
+    Yozib bo'lmaydigan haydovchilarni yig'ib, flush_delay soniyada bir marta
+    bitta UPDATE bilan nofaol qiladi (eslatma raundida yuzlab bo'lishi mumkin).
+    """
+
+    def __init__(self, flush_delay: float = 1.0):
+        self.flush_delay = flush_delay
+        self._ids: set[int] = set()
+        self._task: asyncio.Task | None = None
+        self.total = 0
+
+    def add(self, telegram_id: int) -> None:
+        self._ids.add(telegram_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        ids, self._ids = self._ids, set()
+        if not ids:
+            return
+        try:
+            await deactivate_drivers(ids)
+        except Exception as e:
+            # keyingi flush'da qayta urinamiz
+            self._ids |= ids
+            print("Nofaol qilishda xato:", e)
+            return
+        self.total += len(ids)
+        print(f"Nofaol qilindi: {len(ids)} ta haydovchi (bloklagan / chat yo'q)")
+
+
+BLOCKED_DRIVERS = BlockedDrivers()
@@ -0,0 +1,43 @@
+import time
+
+from app.context import AppContext
+from app.db.database import next_pending_due
+from app.services.scheduler import flush_pending_videos
+from app.utils.wakeup import PENDING_WAKEUP
+
+# Ketma-ket xatolarda flusher'ning o'z backoff chegaralari (soniya)
+FLUSH_MIN_BACKOFF = 5
+FLUSH_MAX_BACKOFF = 300
+
+
+async def run_pending_flusher(bot, ctx: AppContext):
+    """
+    Uzoq yashovchi task: navbatga video tushganda yoki navbatdagi qatorning
+    vaqti kelganda uyg'onadi va navbatni bo'shatadi.
+    Yuborish xato berishda davom etsa, kutish 5s dan 5 daqiqagacha oshadi
+    (bu paytda faqat "tarmoq qaytdi" signali erta uyg'otadi).
+    Navbat bo'sh bo'lsa DB'ga umuman murojaat qilmaydi.
+    """
+    backoff = 0.0
+    while True:
+        try:
+            sent, failed = await flush_pending_videos(bot, ctx)
+        except Exception as e:
+            print("Pending flusher xato:", f"{type(e).__name__}: {e}")
+            sent, failed = 0, 1
+
+        if failed and not sent:
+            backoff = min(FLUSH_MAX_BACKOFF, backoff * 2 if backoff else FLUSH_MIN_BACKOFF)
+        else:
+            backoff = 0.0
+
+        due = await next_pending_due()
+
+        if backoff:
+            timeout = backoff
+        elif due is not None:
+            timeout = max(0.0, due - time.time())
+        else:
+            timeout = None  # navbat bo'sh — faqat signal uyg'otadi
+
+        await PENDING_WAKEUP.wait(timeout, online_only=bool(backoff))
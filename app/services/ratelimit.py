@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Navbat ustuvorligi: kichik raqam — oldinroq
+PRIORITY_LIVE = 0       # haydovchi bilan jonli muloqot, guruhga jonli video
+PRIORITY_NORMAL = 1     # navbatdan yuborish, hisobot
+PRIORITY_BULK = 2       # eslatmalar fan-out
+
+_LANE_NAMES = {PRIORITY_LIVE: "live", PRIORITY_NORMAL: "normal", PRIORITY_BULK: "bulk"}
+
+# Xotirada saqlanadigan chat bucket'lari (LRU: eng uzoq ishlatilmagani chiqadi)
+CHAT_BUCKETS_MAX = 50000
+
+SEND_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "send_priority", default=PRIORITY_LIVE
+)
+
+
+@contextmanager
+def send_priority(priority: int):
+    """
+    with send_priority(PRIORITY_BULK): ... — shu blokdagi barcha bot so'rovlari
+    ko'rsatilgan navbatdan o'tadi.
+    """
+    token = SEND_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        SEND_PRIORITY.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # token / soniya
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = 0.0
+        self.paused_until = 0.0
+        # shu bucket'ni kutayotganlar soni (navbat bo'yicha)
+        self.demand = {p: 0 for p in _LANE_NAMES}
+
+    def _refill(self, now: float) -> None:
+        if self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        pause = self.paused_until - now
+        if self.tokens >= 1:
+            return max(0.0, pause)
+        return max(pause, (1 - self.tokens) / self.rate)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OutboundLimiter:
+    """
+    Telegram'ga chiquvchi xabarlar uchun:
+      - global bucket (~30 xabar/s)
+      - har chat uchun bucket: guruhlar ~20/daqiqa, shaxsiy chat ~1/s
+      - ustuvor navbatlar: global token'ni yoki shu chat token'ini kutayotgan
+        yuqori navbat bo'lsa, pastroq navbat (masalan eslatmalar, navbatdagi
+        videolar) yo'l beradi — guruhning 20/daqiqa'si avval jonli videolarga
+    """
+
+    def __init__(
+        self,
+        global_per_sec: float = 30,
+        group_per_min: float = 20,
+        private_per_sec: float = 1,
+    ):
+        self.configure(
+            global_per_sec=global_per_sec,
+            group_per_min=group_per_min,
+            private_per_sec=private_per_sec,
+        )
+        self._chats: OrderedDict[int, TokenBucket] = OrderedDict()
+        # global token'ni kutayotganlar soni (navbat bo'yicha)
+        self._demand = {p: 0 for p in _LANE_NAMES}
+        self._metrics = {
+            p: {"requests": 0, "throttled": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for p in _LANE_NAMES
+        }
+        self.retry_after_count = 0
+
+    def configure(self, *, global_per_sec: float, group_per_min: float, private_per_sec: float) -> None:
+        self.global_bucket = TokenBucket(global_per_sec, global_per_sec)
+        self.group_rate = group_per_min / 60
+        self.private_rate = private_per_sec
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            self._chats.move_to_end(chat_id)
+            return bucket
+        if chat_id < 0:
+            bucket = TokenBucket(self.group_rate, 3)
+        else:
+            bucket = TokenBucket(self.private_rate, 3)
+        self._chats[chat_id] = bucket
+        if len(self._chats) > CHAT_BUCKETS_MAX:
+            # eng uzoq ishlatilmagan chat (yangisi oxirida — u chiqmaydi)
+            cid, old = next(iter(self._chats.items()))
+            if any(old.demand.values()):
+                self._chats.move_to_end(cid)
+            else:
+                del self._chats[cid]
+        return bucket
+
+    @staticmethod
+    def _higher_demand(demand: dict, priority: int) -> bool:
+        return any(demand[p] for p in demand if p < priority)
+
+    async def acquire(self, chat_id: int, priority: int | None = None) -> float:
+        """
+        Xabar yuborishga ruxsat kelguncha kutadi. Qaytaradi: kutilgan vaqt (s).
+        """
+        if priority is None:
+            priority = SEND_PRIORITY.get()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        chat = self._chat_bucket(chat_id)
+
+        chat.demand[priority] += 1
+        try:
+            while True:
+                now = loop.time()
+                chat_wait = chat.wait_time(now)
+                if chat_wait > 0:
+                    await asyncio.sleep(chat_wait)
+                    continue
+
+                # chat token'i tayyor: shu chatni yoki global token'ni yuqori navbat
+                # kutayotgan bo'lsa, yo'l beramiz (u token'ni olgach qayta tekshiramiz)
+                if self._higher_demand(chat.demand, priority) or self._higher_demand(self._demand, priority):
+                    await asyncio.sleep(1 / self.global_bucket.rate)
+                    continue
+
+                global_wait = self.global_bucket.wait_time(now)
+                if global_wait <= 0:
+                    self.global_bucket.take()
+                    chat.take()
+                    break
+
+                self._demand[priority] += 1
+                try:
+                    await asyncio.sleep(global_wait)
+                finally:
+                    self._demand[priority] -= 1
+        finally:
+            chat.demand[priority] -= 1
+
+        waited = loop.time() - started
+        m = self._metrics[priority]
+        m["requests"] += 1
+        m["wait_total"] += waited
+        m["wait_max"] = max(m["wait_max"], waited)
+        if waited > 0.001:
+            m["throttled"] += 1
+        return waited
+
+    def pause(self, seconds: float, chat_id: int | None = None) -> None:
+        """
+        429 RetryAfter: global (yoki bitta chat) bucket'ni to'xtatib turamiz.
+        """
+        self.retry_after_count += 1
+        until = asyncio.get_running_loop().time() + seconds
+        bucket = self.global_bucket if chat_id is None else self._chat_bucket(chat_id)
+        bucket.paused_until = max(bucket.paused_until, until)
+
+    def stats(self) -> dict:
+        lanes = {}
+        for p, m in self._metrics.items():
+            lanes[_LANE_NAMES[p]] = {
+                "requests": m["requests"],
+                "throttled": m["throttled"],
+                "wait_avg": round(m["wait_total"] / m["requests"], 3) if m["requests"] else 0.0,
+                "wait_max": round(m["wait_max"], 3),
+                "waiting": self._demand[p],
+            }
+        return {"lanes": lanes, "retry_after": self.retry_after_count}
+
+
+OUTBOUND_LIMITER = OutboundLimiter()
@@ -1,8 +1,9 @@
 ﻿from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from app.config import load_config
+from app.context import AppContext
 from app.db.database import get_senders_for_date
+from app.services.ratelimit import PRIORITY_NORMAL, send_priority
 
 
 def now_tz(tz: str) -> datetime:
@@ -13,12 +14,11 @@ def date_str(d: datetime) -> str:
     return d.strftime("%Y-%m-%d")
 
 
-async def send_daily_group_report(bot):
+async def send_daily_group_report(bot, ctx: AppContext):
     """
     ✅ 07:00 da guruhga KECHAGI kunda video yuborgan haydovchilar ro'yxati.
     """
-    cfg = load_config()
-
+    cfg = ctx.config
     yesterday = now_tz(cfg.timezone) - timedelta(days=1)
     date = date_str(yesterday)
 
@@ -35,11 +35,10 @@ async def send_daily_group_report(bot):
 
     if not rows:
         text += "\n❗ Kecha hech kim video yubormagan."
-        await bot.send_message(chat_id=cfg.group_chat_id, text=text)
-        return
+    else:
+        text += "\n📌 Ro'yxat:\n"
+        for i, (_tid, fn, ln, cnt) in enumerate(rows, start=1):
+            text += f"{i}) {fn} {ln} — {cnt} ta\n"
 
-    text += "\n📌 Ro'yxat:\n"
-    for i, (_tid, fn, ln, cnt) in enumerate(rows, start=1):
-        text += f"{i}) {fn} {ln} — {cnt} ta\n"
-
-    await bot.send_message(chat_id=cfg.group_chat_id, text=text)
+    with send_priority(PRIORITY_NORMAL):
+        await bot.send_message(chat_id=cfg.group_chat_id, text=text)
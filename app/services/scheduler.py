@@ -1,145 +1,339 @@
-﻿from datetime import datetime
+﻿import asyncio
+import json
+import time
+from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
-from aiogram.exceptions import TelegramForbiddenError
+from aiogram.exceptions import TelegramRetryAfter
 
 from app.keyboards.common import reminder_kb
 from app.db.database import (
-    get_all_users,
-    ensure_daily_row,
-    get_pending_videos,
-    bump_pending_attempt,
+    seed_daily_rows,
+    get_pending_driver_ids,
+    start_reminder_run,
+    checkpoint_reminder_run,
+    get_unfinished_reminder_slots,
+    claim_pending_videos,
+    fail_pending_video,
+    dead_letter_pending_video,
     delete_pending_video,
     get_user,
     add_video,
 )
+from app.db.archive import archive_closed_months
+from app.utils.wakeup import PENDING_WAKEUP
 from app.services.report import send_daily_group_report
-from app.config import load_config
-from app.services.sheets import SheetsConfig, append_video_row
+from app.services.album import GROUP_ALBUMS
+from app.services.blocked import is_chat_unreachable
+from app.services.ratelimit import send_priority, PRIORITY_BULK, PRIORITY_NORMAL
+from app.context import AppContext
 
 
 def today_str(tz: str) -> str:
     return datetime.now(ZoneInfo(tz)).strftime("%Y-%m-%d")
 
 
-async def send_reminders(bot, tz: str):
-    users = await get_all_users()
-    date = today_str(tz)
+# Eslatma raundi progressini DB'ga yozish oralig'i (soniya)
+REMINDER_CHECKPOINT_SECONDS = 1.0
 
-    for row in users:
-        telegram_id = row[0]
-        await ensure_daily_row(telegram_id, date)
-        try:
-            await bot.send_message(
-                chat_id=telegram_id,
-                text="🎥 Video jo'natish esingizdan chiqmadimi?",
-                reply_markup=reminder_kb(),
-            )
-        except TelegramForbiddenError:
-            # user botni block qilgan — crash qilmaymiz
-            continue
-        except Exception:
-            continue
+REMINDER_SLOTS = ("10:00", "15:00", "18:00")
 
+# Hozir ketayotgan raundlar (date, slot): resume job va cron bir raundni ikki marta yubormasin
+_RUNNING_REMINDERS: set[tuple[str, str]] = set()
 
-async def flush_pending_videos(bot):
+
+async def send_reminders(bot, ctx: AppContext, slot: str, date: str | None = None):
     """
-    Internet sust bo'lganda navbatga tushgan videolarni keyinroq yuboradi.
-    Har 2 daqiqada ishlaydi.
+    Bugun hali PENDING turgan haydovchilarga eslatma (worker pool bilan parallel).
+    Progress reminder_runs'da: jarayon uzilsa, raund kursordan davom etadi.
     """
-    cfg = load_config()
-    pendings = await get_pending_videos(limit=20)
-    if not pendings:
+    date = date or today_str(ctx.config.timezone)
+    key = (date, slot)
+    if key in _RUNNING_REMINDERS:
+        print(f"Eslatma {date} {slot}: raund allaqachon ketyapti, o'tkazib yuborildi")
         return
+    _RUNNING_REMINDERS.add(key)
+    try:
+        await _run_reminders(bot, ctx, slot, date)
+    finally:
+        _RUNNING_REMINDERS.discard(key)
+
+
+async def _run_reminders(bot, ctx: AppContext, slot: str, date: str):
+    concurrency = ctx.config.reminder_concurrency
+
+    cursor, sent, blocked, failed, finished_at = await start_reminder_run(date, slot)
+    if finished_at:
+        return
+    resumed = cursor > 0
+
+    # 2 ta so'rov: butun park uchun kunlik qator + faqat PENDING'dagilar ro'yxati
+    await seed_daily_rows(date)
+    driver_ids = await get_pending_driver_ids(date, after=cursor)
+
+    started = time.monotonic()
+    counts = {"sent": sent, "blocked": blocked, "failed": failed}
+
+    # kursor: shu indeksgacha hammasi tugagan (parallel workerlar tartibsiz tugatadi).
+    # counts ham faqat kursorgacha qo'shiladi: davom ettirilgan raund qayta
+    # yuboradiganlar ikki marta sanalmaydi
+    results: list[str | None] = [None] * len(driver_ids)
+    state = {"watermark": -1, "cursor": cursor}
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(len(driver_ids)):
+        queue.put_nowait(i)
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await bot.send_message(
+                    chat_id=driver_ids[i],
+                    text="🎥 Video jo'natish esingizdan chiqmadimi?",
+                    reply_markup=reminder_kb(),
+                )
+                results[i] = "sent"
+            except Exception as e:
+                # botni bloklaganlarni BlockedChatMiddleware nofaol qiladi
+                results[i] = "blocked" if is_chat_unreachable(e) else "failed"
+
+            w = state["watermark"]
+            while w + 1 < len(results) and results[w + 1] is not None:
+                w += 1
+                counts[results[w]] += 1
+            state["watermark"] = w
+            if w >= 0:
+                state["cursor"] = driver_ids[w]
+
+    async def checkpointer():
+        while True:
+            await asyncio.sleep(REMINDER_CHECKPOINT_SECONDS)
+            await checkpoint_reminder_run(date, slot, state["cursor"], **counts)
+
+    # eslatmalar eng past navbatda: jonli videolar va javoblar oldinda o'tadi,
+    # tezlik va 429 RetryAfter'ni RateLimitMiddleware boshqaradi
+    saver = asyncio.create_task(checkpointer())
+    try:
+        with send_priority(PRIORITY_BULK):
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        saver.cancel()
+
+    await checkpoint_reminder_run(date, slot, state["cursor"], **counts, finished=True)
+
+    took = time.monotonic() - started
+    print(
+        f"Eslatma {date} {slot}{' (davom ettirildi)' if resumed else ''}: "
+        f"{counts['sent']} yuborildi, {counts['blocked']} bloklagan, "
+        f"{counts['failed']} xato, {took:.1f}s"
+    )
+
+
+async def resume_reminder_runs(bot, ctx: AppContext):
+    """
+    Ishga tushganda: bugun uzilib qolgan eslatma raundlarini davom ettiradi.
+    """
+    date = today_str(ctx.config.timezone)
+    for slot in await get_unfinished_reminder_slots(date):
+        await send_reminders(bot, ctx, slot, date=date)
+
+
+async def _legacy_payload(cfg, telegram_id: int, date: str, kindergarten_no: str) -> dict | None:
+    """
+    Payload ustuni qo'shilishidan oldin navbatga tushgan qatorlar uchun:
+    user ma'lumotlaridan caption va Sheets maydonlarini qayta yig'amiz.
+    """
+    user = await get_user(telegram_id)
+    if not user:
+        return None
+
+    first_name = user[1]
+    last_name = user[2]
+    phone = user[3] or ""
+    car_plate = user[4] or ""
+
+    stamp = datetime.now(ZoneInfo(cfg.timezone)).strftime("%Y-%m-%d %H:%M")
+    caption = (
+        "📦 Yetkazib berish tasdiqi\n"
+        f"🏫 Bog'cha №: {kindergarten_no}\n"
+        f"👤 Yetkazib beruvchi: {first_name} {last_name}\n"
+        f"📞 Telefon: {phone}\n"
+        f"🚗 Avto: {car_plate}\n"
+        f"🕒 Vaqt: {stamp}\n"
+        f"⏳ (Navbatdan yuborildi)"
+    )
+    return {
+        "caption": caption,
+        "parse_mode": None,
+        "sheet": {
+            "first_name": first_name,
+            "last_name": last_name,
+            "phone": phone,
+            "car_plate": car_plate,
+            "date_str": date,
+            "kindergarten_no": kindergarten_no,
+        },
+    }
+
+
+async def _send_pending_video(bot, ctx: AppContext, flood: dict, row) -> bool:
+    """
+    Navbatdagi bitta videoni guruhga yuboradi (+ Sheets + DB).
+    Qaytaradi: True — guruhga yuborildi va navbatdan chiqdi (DB yozuvi
+    yiqilsa — havola bilan dead-letter'da).
+    """
+    pid, telegram_id, date, kindergarten_no, file_id, attempts, payload = row
+
+    # caption va Sheets maydonlari navbatga tushgan paytdagidek (jonli post bilan bir xil)
+    if payload:
+        payload = json.loads(payload)
+    else:
+        payload = await _legacy_payload(ctx.config, telegram_id, date, kindergarten_no)
+        if payload is None:
+            await dead_letter_pending_video(pid, "user topilmadi")
+            return False
+
+    loop = asyncio.get_running_loop()
+    try:
+        # boshqa worker flood-control olgan bo'lsa, hamma kutadi
+        wait = flood["until"] - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        sent = await GROUP_ALBUMS.send_video(
+            bot,
+            ctx.config.group_chat_id,
+            video=file_id,
+            caption=payload["caption"],
+            parse_mode=payload.get("parse_mode"),
+        )
+    except Exception as e:
+        if isinstance(e, TelegramRetryAfter):
+            # middleware qayta urinishlari ham tugadi: qolgan worker'lar Telegram
+            # aytgan vaqtcha kutadi, bu video esa urinish sifatida backoff'ga
+            flood["until"] = max(flood["until"], loop.time() + e.retry_after)
+        # backoff bilan keyinroq; urinishlar tugasa dead-letter'ga
+        await fail_pending_video(pid, int(attempts), f"{type(e).__name__}: {e}")
+        return False
+
+    # Telegram link (Sheets uchun)
+    internal_id = str(ctx.config.group_chat_id)
+    if internal_id.startswith("-100"):
+        internal_id = internal_id[4:]
+    else:
+        internal_id = internal_id.lstrip("-")
+    video_link = f"https://t.me/c/{internal_id}/{sent.message_id}"
+
+    # DB + Sheets outbox (bitta tranzaksiya)
+    try:
+        await add_video(
+            telegram_id,
+            date,
+            kindergarten_no,
+            file_id,
+            sheet_append=ctx.sheets.video_row(**payload["sheet"], video_link=video_link),
+        )
+    except Exception as e:
+        # video guruhda bor, lekin DB / Sheets qatori yozilmadi: qayta yuborsak
+        # guruhda dublikat bo'ladi — qator havola bilan dead-letter'da qoladi
+        err = f"add_video: {type(e).__name__}: {e} ({video_link})"
+        print("Pending video DB xato:", err)
+        await dead_letter_pending_video(pid, err)
+        return True
+
+    # navbatdan o'chiramiz
+    await delete_pending_video(pid)
+    return True
+
+
+async def flush_pending_videos(bot, ctx: AppContext) -> tuple[int, int]:
+    """
+    Internet sust bo'lganda navbatga tushgan videolarni keyinroq yuboradi.
+    Drain rejimi: navbatda tayyor qator qolmaguncha, bir vaqtda
+    ctx.config.pending_drain_concurrency tadan yuboradi. Flusher task (services/flusher.py)
+    chaqiradi. Qaytaradi: (yuborildi, xato).
+    """
+    concurrency = max(1, ctx.config.pending_drain_concurrency)
+    if GROUP_ALBUMS.enabled:
+        # albom to'lishi uchun kamida max_items ta video bir vaqtda kutishi kerak
+        concurrency = max(concurrency, GROUP_ALBUMS.max_items)
+    sem = asyncio.Semaphore(concurrency)
+    flood = {"until": 0.0}
 
-    for pid, telegram_id, date, kindergarten_no, file_id, attempts in pendings:
-        # 1) user ma'lumotlari
-        user = await get_user(telegram_id)
-        if not user:
-            await delete_pending_video(pid)
-            continue
-
-        first_name = user[1]
-        last_name = user[2]
-        phone = user[3] or ""
-        car_plate = user[4] or ""
-
-        # 2) caption (oddiy, username/personal mention bu yerda kerak emas — guruh uchun)
-        stamp = datetime.now(ZoneInfo(cfg.timezone)).strftime("%Y-%m-%d %H:%M")
-        caption = (
-            "📦 Yetkazib berish tasdiqi\n"
-            f"🏫 Bog'cha №: {kindergarten_no}\n"
-            f"👤 Yetkazib beruvchi: {first_name} {last_name}\n"
-            f"📞 Telefon: {phone}\n"
-            f"🚗 Avto: {car_plate}\n"
-            f"🕒 Vaqt: {stamp}\n"
-            f"⏳ (Navbatdan yuborildi)"
+    async def worker(row) -> bool:
+        # navbatdagi videolar jonli yuborishlardan keyin, eslatmalardan oldin
+        async with sem:
+            with send_priority(PRIORITY_NORMAL):
+                return await _send_pending_video(bot, ctx, flood, row)
+
+    started = time.monotonic()
+    sent = failed = 0
+    while True:
+        pendings = await claim_pending_videos(limit=concurrency * 4)
+        if not pendings:
+            break
+
+        results = await asyncio.gather(*(worker(row) for row in pendings))
+        ok = sum(results)
+        sent += ok
+        failed += len(results) - ok
+
+        # butun batch yiqildi — tarmoq hali yo'q, keyingi tick'da qaytamiz
+        if ok == 0:
+            break
+
+    if sent or failed:
+        took = time.monotonic() - started
+        print(
+            f"Pending drain: {sent} yuborildi, {failed} xato, "
+            f"{took:.1f}s ({sent / took if took else 0:.1f} video/s)"
         )
+    return sent, failed
+
+
+async def wake_pending_flusher():
+    PENDING_WAKEUP.notify()
+
 
-        try:
-            sent = await bot.send_video(
-                chat_id=cfg.group_chat_id,
-                video=file_id,
-                caption=caption,
-            )
-        except Exception as e:
-            # ko'p urinish bo'lsa o'chirib yuboramiz (masalan 10 martadan keyin)
-            await bump_pending_attempt(pid, f"{type(e).__name__}: {e}")
-            if int(attempts) >= 9:
-                await delete_pending_video(pid)
-            continue
-
-        # Telegram link (Sheets uchun)
-        internal_id = str(cfg.group_chat_id)
-        if internal_id.startswith("-100"):
-            internal_id = internal_id[4:]
-        else:
-            internal_id = internal_id.lstrip("-")
-        video_link = f"https://t.me/c/{internal_id}/{sent.message_id}"
-
-        # Sheets
-        sheet_row = None
-        try:
-            sheets_cfg = SheetsConfig(sheet_id=cfg.sheet_id)
-            sheet_row = append_video_row(
-                sheets_cfg,
-                first_name=first_name,
-                last_name=last_name,
-                phone=phone,
-                car_plate=car_plate,
-                date_str=date,
-                kindergarten_no=kindergarten_no,
-                video_link=video_link,
-            )
-        except Exception:
-            sheet_row = None
-
-        # DB
-        try:
-            await add_video(telegram_id, date, kindergarten_no, file_id, sheet_row=sheet_row)
-        except Exception:
-            pass
-
-        # navbatdan o'chiramiz
-        await delete_pending_video(pid)
-
-
-def setup_scheduler(bot, timezone: str) -> AsyncIOScheduler:
-    scheduler = AsyncIOScheduler(timezone=ZoneInfo(timezone))
+async def archive_old_data(ctx: AppContext):
+    """
+    Yopilgan oylarni oylik arxiv fayllariga ko'chiradi (hot DB kichik qoladi).
+    """
+    today = datetime.now(ZoneInfo(ctx.config.timezone)).date()
+    summary = await archive_closed_months(
+        ctx.pool, keep_days=ctx.config.archive_keep_days, today=today
+    )
+    for month, (daily_moved, videos_moved) in summary.items():
+        print(f"Arxiv {month}: daily={daily_moved}, videos={videos_moved}")
+
+
+def setup_scheduler(bot, ctx: AppContext) -> AsyncIOScheduler:
+    scheduler = AsyncIOScheduler(timezone=ZoneInfo(ctx.config.timezone))
 
     # ✅ 3 marotaba eslatma
-    scheduler.add_job(send_reminders, CronTrigger(hour=10, minute=0), args=[bot, timezone])
-    scheduler.add_job(send_reminders, CronTrigger(hour=15, minute=0), args=[bot, timezone])
-    scheduler.add_job(send_reminders, CronTrigger(hour=18, minute=0), args=[bot, timezone])
+    for slot in REMINDER_SLOTS:
+        hour, minute = (int(x) for x in slot.split(":"))
+        scheduler.add_job(
+            send_reminders, CronTrigger(hour=hour, minute=minute), args=[bot, ctx, slot]
+        )
+
+    # ✅ restartdan keyin: bugun uzilib qolgan raundlar (bir marta, darhol)
+    scheduler.add_job(resume_reminder_runs, args=[bot, ctx])
 
-    # ✅ pending videolarni flush (2 daqiqada bir)
-    scheduler.add_job(flush_pending_videos, IntervalTrigger(minutes=2), args=[bot])
+    # ✅ pending flusher signal bilan ishlaydi; bu faqat sekin "safety net"
+    scheduler.add_job(wake_pending_flusher, IntervalTrigger(minutes=10))
 
     # ✅ 07:00 guruhga hisobot
-    scheduler.add_job(send_daily_group_report, CronTrigger(hour=7, minute=0), args=[bot])
+    scheduler.add_job(send_daily_group_report, CronTrigger(hour=7, minute=0), args=[bot, ctx])
+
+    # ✅ 03:30 eski oylarni arxivga ko'chirish
+    scheduler.add_job(archive_old_data, CronTrigger(hour=3, minute=30), args=[ctx])
 
     return scheduler
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import os
 import json
+import re
+import threading
 
 import gspread
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2.service_account import Credentials
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
+# updatedRange: "'Logs'!A1021:J1021" -> 1021
+_UPDATED_ROW = re.compile(r"![A-Z]+(\d+)")
+
 
 @dataclass
 class SheetsConfig:
@@ -19,25 +25,145 @@ class SheetsConfig:
     timezone: str = "Asia/Tashkent"
 
 
-def _client() -> gspread.Client:
+class SheetsSession:
     """
-    Railway Variables -> GOOGLE_CREDS_JSON ichidan Service Account JSON olinadi.
+    Jarayon bo'yicha yagona Sheets sessiyasi:
+      - Service Account bir marta avtorizatsiya qilinadi, bitta HTTP sessiya
+        (keep-alive) qayta ishlatiladi
+      - token muddati tugashiga refresh_margin soniya qolganda oldindan yangilanadi
+      - Worksheet handle'lari (sheet_id, worksheet) bo'yicha keshlanadi:
+        har amal metadata so'rovisiz, bitta HTTP so'rov
+    Amallar thread'larda (asyncio.to_thread) ham chaqiriladi — lock bilan.
     """
-    creds_json = os.getenv("GOOGLE_CREDS_JSON")
-    if not creds_json:
-        raise RuntimeError("GOOGLE_CREDS_JSON topilmadi (Railway Variables tekshiring).")
 
-    info = json.loads(creds_json)
-    creds = Credentials.from_service_account_info(info, scopes=SCOPES)
-    return gspread.authorize(creds)
+    def __init__(self, creds_info: dict, refresh_margin: float = 300):
+        self.refresh_margin = refresh_margin
+        self._creds = Credentials.from_service_account_info(creds_info, scopes=SCOPES)
+        self._gc = gspread.authorize(self._creds)
+        self._worksheets: dict[tuple[str, str], gspread.Worksheet] = {}
+        # (sheet_id, worksheet) -> oxirgi ma'lum to'ldirilgan qator (append javobidan)
+        self._last_rows: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> gspread.Client:
+        self._ensure_fresh()
+        return self._gc
+
+    def _token_stale(self) -> bool:
+        expiry = self._creds.expiry  # naive UTC
+        if not self._creds.token or expiry is None:
+            return True
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return expiry - now < timedelta(seconds=self.refresh_margin)
+
+    def _ensure_fresh(self) -> None:
+        if not self._token_stale():
+            return
+        with self._lock:
+            if self._token_stale():
+                self._creds.refresh(GoogleAuthRequest())
+
+    def worksheet(self, sheet_id: str, name: str) -> gspread.Worksheet:
+        self._ensure_fresh()
+        key = (sheet_id, name)
+        ws = self._worksheets.get(key)
+        if ws is None:
+            with self._lock:
+                ws = self._worksheets.get(key)
+                if ws is None:
+                    ws = self._gc.open_by_key(sheet_id).worksheet(name)
+                    self._worksheets[key] = ws
+        return ws
+
+    def invalidate(self, sheet_id: str, name: str) -> None:
+        """
+        Worksheet o'chirilgan / qayta nomlangan bo'lsa — keyingi chaqiruv qayta topadi.
+        """
+        self._worksheets.pop((sheet_id, name), None)
+        self._last_rows.pop((sheet_id, name), None)
+
+    def appended_row(
+        self, sheet_id: str, name: str, ws: gspread.Worksheet, response: dict, count: int = 1
+    ) -> int:
+        """
+        append javobidagi updatedRange'dan ("'Logs'!A1021:J1030") qo'shilgan
+        birinchi qator raqami. Javobda bo'lmasa — keshdagi hisoblagich (birinchi
+        marta bir martalik to'liq o'qish bilan to'ldiriladi).
+        count: bitta append'dagi qatorlar soni.
+        """
+        key = (sheet_id, name)
+        m = _UPDATED_ROW.search((response or {}).get("updates", {}).get("updatedRange", ""))
+        total = None
+        while True:
+            if not m and total is None and key not in self._last_rows:
+                # to'liq o'qish lock'dan tashqarida: boshqa varaqlar kutib qolmasin
+                total = len(ws.get_all_values())
+            with self._lock:
+                if m:
+                    row = int(m.group(1))
+                elif key in self._last_rows:
+                    row = self._last_rows[key] + 1
+                elif total is not None:
+                    row = total - count + 1
+                else:
+                    # tekshiruvdan keyin kesh tozalandi (drop) — o'qiymiz
+                    continue
+                self._last_rows[key] = max(row + count - 1, self._last_rows.get(key, 0))
+                return row
+
+
+_session: SheetsSession | None = None
+_session_lock = threading.Lock()
+# har HTTP so'rov uchun timeout (soniya), None — cheklovsiz
+_http_timeout: float | None = None
+
+
+def set_http_timeout(timeout: float | None) -> None:
+    global _http_timeout
+    _http_timeout = timeout
+    if _session is not None:
+        _session._gc.set_timeout(timeout)
+
+
+def get_session() -> SheetsSession:
+    """
+    Railway Variables -> GOOGLE_CREDS_JSON ichidan Service Account JSON olinadi
+    (birinchi chaqiruvda bir marta).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                creds_json = os.getenv("GOOGLE_CREDS_JSON")
+                if not creds_json:
+                    raise RuntimeError("GOOGLE_CREDS_JSON topilmadi (Railway Variables tekshiring).")
+                _session = SheetsSession(json.loads(creds_json))
+                _session._gc.set_timeout(_http_timeout)
+    return _session
+
+
+def _on_worksheet(cfg: SheetsConfig, op):
+    """
+    op(ws) ni keshdagi worksheet ustida bajaradi. Worksheet topilmasa
+    (o'chirilgan / qayta nomlangan) handle keshdan chiqariladi.
+    """
+    session = get_session()
+    ws = session.worksheet(cfg.sheet_id, cfg.worksheet)
+    try:
+        return op(ws)
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code in (400, 404):
+            session.invalidate(cfg.sheet_id, cfg.worksheet)
+        raise
 
 
 def _now_str(tz: str) -> str:
     return datetime.now(ZoneInfo(tz)).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def append_video_row(
-    cfg: SheetsConfig,
+def video_row(
+    tz: str,
     *,
     first_name: str,
     last_name: str,
@@ -46,17 +172,13 @@ def append_video_row(
     date_str: str,
     kindergarten_no: str,
     video_link: str,
-) -> int:
+) -> list[str]:
     """
-    Video kelganda yangi qator qo'shadi.
-    Qaytaradi: qo'shilgan qator raqami (1-based)
+    Video qatori (A..J). Timestamp — chaqirilgan payt (outbox'da kutsa ham).
     """
-    gc = _client()
-    ws = gc.open_by_key(cfg.sheet_id).worksheet(cfg.worksheet)
-
-    ts = _now_str(cfg.timezone)
+    ts = _now_str(tz)
 
-    row = [
+    return [
         ts,                 # A Timestamp
         date_str,           # B Sana
         first_name,         # C Ism
@@ -69,12 +191,9 @@ def append_video_row(
         "",                 # J Sabab
     ]
 
-    ws.append_row(row, value_input_option="USER_ENTERED")
-    return len(ws.get_all_values())
 
-
-def append_reminder_event(
-    cfg: SheetsConfig,
+def reminder_event_row(
+    tz: str,
     *,
     first_name: str,
     last_name: str,
@@ -83,13 +202,10 @@ def append_reminder_event(
     date_str: str,
     action: str,
     reason: str = "",
-) -> int:
-    gc = _client()
-    ws = gc.open_by_key(cfg.sheet_id).worksheet(cfg.worksheet)
-
-    ts = _now_str(cfg.timezone)
+) -> list[str]:
+    ts = _now_str(tz)
 
-    row = [
+    return [
         ts,         # A
         date_str,   # B
         first_name, # C
@@ -102,17 +218,41 @@ def append_reminder_event(
         reason,     # J
     ]
 
-    ws.append_row(row, value_input_option="USER_ENTERED")
-    return len(ws.get_all_values())
 
+def append_rows(cfg: SheetsConfig, rows: list[list[str]]) -> int:
+    """
+    Bir nechta qatorni bitta values.append so'rovida qo'shadi (ketma-ket joylashadi).
+    Qaytaradi: birinchi qo'shilgan qator raqami (1-based)
+    """
+    def op(ws):
+        response = ws.append_rows(rows, value_input_option="USER_ENTERED")
+        return get_session().appended_row(cfg.sheet_id, cfg.worksheet, ws, response, count=len(rows))
 
-def update_reason(cfg: SheetsConfig, *, sheet_row: int, reason: str) -> None:
-    gc = _client()
-    ws = gc.open_by_key(cfg.sheet_id).worksheet(cfg.worksheet)
-    ws.update_cell(sheet_row, 10, reason)  # J = 10
+    return _on_worksheet(cfg, op)
 
 
-def update_reminder_action(cfg: SheetsConfig, *, sheet_row: int, action: str) -> None:
-    gc = _client()
-    ws = gc.open_by_key(cfg.sheet_id).worksheet(cfg.worksheet)
-    ws.update_cell(sheet_row, 9, action)  # I = 9
+def coalesce_cells(cells) -> dict[tuple[int, int], str]:
+    """
+    (qator, ustun) bo'yicha birlashtiradi: bir katakchaga bir necha qiymat
+    bo'lsa, oxirgisi yutadi (cells — yozilish tartibida).
+    """
+    merged: dict[tuple[int, int], str] = {}
+    for row, col, value in cells:
+        merged[(row, col)] = value
+    return merged
+
+
+def update_cells(cfg: SheetsConfig, cells: list[tuple[int, int, str]]) -> int:
+    """
+    [(qator, ustun, qiymat), ...] — birlashtirilib, bitta values:batchUpdate so'rovida.
+    Qaytaradi: yozilgan katakchalar soni.
+    """
+    merged = coalesce_cells(cells)
+    if not merged:
+        return 0
+    data = [
+        {"range": gspread.utils.rowcol_to_a1(row, col), "values": [[value]]}
+        for (row, col), value in merged.items()
+    ]
+    _on_worksheet(cfg, lambda ws: ws.batch_update(data, value_input_option="USER_ENTERED"))
+    return len(data)
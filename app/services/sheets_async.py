@@ -0,0 +1,143 @@
+import asyncio
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import gspread
+
+from app.services import sheets
+from app.services.sheets import SheetsConfig
+
+# 429 / 5xx qayta urinish backoff'i (soniya): base * 2^n, cap bilan, jitter
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_CAP = 64.0
+
+
+def _retryable(e: Exception) -> int | None:
+    """
+    Qayta urinsa bo'ladigan Sheets xatosi bo'lsa — HTTP status, aks holda None.
+    """
+    if isinstance(e, gspread.exceptions.APIError):
+        status = e.response.status_code
+        if status == 429 or status >= 500:
+            return status
+    return None
+
+
+class SheetsQuota:
+    """
+    Sheets so'rovlari uchun sirpanuvchi byudjet: oxirgi `window` soniyada
+    ko'pi bilan `per_minute` ta so'rov. Byudjet tugasa chaqiruv xato bermaydi —
+    navbatda (FIFO) eng eski so'rov oynadan chiqquncha kutadi.
+    Har AsyncSheets chaqiruvi ≈ bitta HTTP so'rov (worksheet handle keshlangan).
+    """
+
+    def __init__(self, per_minute: int = 60, window: float = 60.0):
+        self.per_minute = max(1, per_minute)
+        self.window = window
+        self._sent: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+        self.requests = 0
+        self.throttled = 0
+        self.throttle_wait = 0.0
+        self.retries = 0
+        self.errors: dict[int, int] = {}
+
+    def _trim(self, now: float) -> None:
+        while self._sent and self._sent[0] <= now - self.window:
+            self._sent.popleft()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._sent) >= self.per_minute:
+                self.throttled += 1
+                started = now
+                while len(self._sent) >= self.per_minute:
+                    await asyncio.sleep(self._sent[0] + self.window - now)
+                    now = time.monotonic()
+                    self._trim(now)
+                self.throttle_wait += now - started
+            self._sent.append(now)
+            self.requests += 1
+
+    def retry_delay(self, attempt: int, status: int) -> float:
+        self.retries += 1
+        self.errors[status] = self.errors.get(status, 0) + 1
+        # eksponensial backoff + jitter (delay/2 .. delay)
+        delay = min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def stats(self) -> dict:
+        self._trim(time.monotonic())
+        return {
+            "used": len(self._sent),
+            "limit": self.per_minute,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "throttle_wait": round(self.throttle_wait, 1),
+            "retries": self.retries,
+            "errors": dict(self.errors),
+        }
+
+
+class AsyncSheets:
+    """
+    sheets.py (bloklovchi gspread) ustidan async qobiq:
+      - chaqiruvlar alohida, cheklangan thread pool'da (max_workers) bajariladi,
+        event loop hech qachon Google'ni kutib qotib qolmaydi
+      - har chaqiruvga timeout: oshsa asyncio.TimeoutError (HTTP so'rovning
+        o'zi ham shu timeout bilan uziladi, thread bo'shaydi)
+      - har urinish SheetsQuota byudjetidan o'tadi; 429 / 5xx — backoff bilan
+        max_retries martagacha qayta urinadi
+    AppContext.sheets sifatida handler va job'larga beriladi.
+    """
+
+    def __init__(
+        self,
+        cfg: SheetsConfig,
+        max_workers: int = 4,
+        timeout: float = 20,
+        requests_per_min: int = 60,
+        max_retries: int = 5,
+    ):
+        self.cfg = cfg
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.quota = SheetsQuota(requests_per_min)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="sheets")
+        sheets.set_http_timeout(timeout)
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self.quota.acquire()
+            future = loop.run_in_executor(self._executor, partial(fn, self.cfg, *args, **kwargs))
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            except Exception as e:
+                status = _retryable(e)
+                if status is None or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self.quota.retry_delay(attempt, status))
+                attempt += 1
+
+    def video_row(self, **fields) -> list[str]:
+        return sheets.video_row(self.cfg.timezone, **fields)
+
+    def reminder_event_row(self, **fields) -> list[str]:
+        return sheets.reminder_event_row(self.cfg.timezone, **fields)
+
+    async def append_rows(self, rows: list[list[str]]) -> int:
+        return await self._call(sheets.append_rows, rows)
+
+    async def update_cells(self, cells: list[tuple[int, int, str]]) -> int:
+        return await self._call(sheets.update_cells, cells)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
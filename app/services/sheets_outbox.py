@@ -0,0 +1,153 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+import gspread
+
+from app.context import AppContext
+from app.db.database import (
+    complete_sheets_appends,
+    dead_letter_sheets_outbox,
+    defer_sheets_outbox,
+    delete_sheets_outbox,
+    fail_sheets_outbox,
+    get_due_sheets_outbox,
+    get_video_sheet_rows,
+    next_sheets_outbox_due,
+)
+from app.utils.wakeup import SHEETS_WAKEUP
+
+# Bitta Sheets so'roviga ketadigan outbox yozuvlari
+SHEETS_OUTBOX_BATCH = 200
+# DB xatosidan keyin worker shuncha kutadi (aylanib qolmaslik uchun)
+SHEETS_OUTBOX_DEFER = 5
+# uyg'ongandan keyin shuncha kutib yig'amiz: tugma bosishlar to'lqini bitta so'rovga tushadi
+SHEETS_OUTBOX_LINGER = 0.5
+
+# /stats uchun: Sheets so'rovlari, qo'shilgan qatorlar, yozilgan / birlashtirilgan katakchalar,
+# dead-letter'ga ko'chganlar
+SHEETS_OUTBOX_STATS = Counter()
+
+
+def _bad_request(e: Exception) -> bool:
+    return isinstance(e, gspread.exceptions.APIError) and e.response.status_code == 400
+
+
+async def _flush_appends(ctx: AppContext, rows) -> tuple[int, int]:
+    """
+    Hamma append'lar bitta values.append so'rovida; qatorlar ketma-ket
+    joylashadi, shuning uchun har birining raqami = birinchi + i.
+    """
+    if not rows:
+        return 0, 0
+    values = [json.loads(payload)["row"] for _, _, _, payload, _ in rows]
+    try:
+        first = await ctx.sheets.append_rows(values)
+    except Exception as e:
+        if len(rows) > 1 and _bad_request(e):
+            # bitta buzuq qator butun partiyani to'xtatib qo'ymasin
+            done = failed = 0
+            for row in rows:
+                d, f = await _flush_appends(ctx, [row])
+                done, failed = done + d, failed + f
+            return done, failed
+        print("Sheets outbox append xato:", f"{type(e).__name__}: {e}")
+        SHEETS_OUTBOX_STATS["dead"] += await fail_sheets_outbox(
+            [(r[0], r[4]) for r in rows], f"{type(e).__name__}: {e}"
+        )
+        return 0, len(rows)
+
+    SHEETS_OUTBOX_STATS["requests"] += 1
+    SHEETS_OUTBOX_STATS["rows"] += len(rows)
+    await complete_sheets_appends([(r[0], r[2], first + i) for i, r in enumerate(rows)])
+    return len(rows), 0
+
+
+async def _flush_updates(ctx: AppContext, rows) -> tuple[int, int]:
+    """
+    Katakcha update'lari bitta values:batchUpdate so'rovida, (qator, ustun)
+    bo'yicha birlashtirilib (oxirgisi yutadi). Video qatori hali Sheets'da
+    bo'lmasa — append'ining navbatdagi urinishigacha kutadi; append
+    dead-letter'da bo'lsa, update ham o'sha yerga.
+    """
+    if not rows:
+        return 0, 0
+    videos = await get_video_sheet_rows({r[2] for r in rows})
+
+    cells, ready, waiting, parked, dropped = [], [], [], [], []
+    for oid, _, video_id, payload, attempts in rows:
+        sheet_row, append_due, append_dead = videos.get(video_id, (None, None, False))
+        if sheet_row:
+            p = json.loads(payload)
+            cells.append((sheet_row, p["col"], p["value"]))
+            ready.append((oid, attempts))
+        elif append_due is not None:
+            waiting.append((oid, append_due))
+        elif append_dead:
+            parked.append(oid)
+        else:
+            # video o'chirilgan / Sheets'ga hech qachon yozilmagan — yozadigan joy yo'q
+            dropped.append(oid)
+
+    await defer_sheets_outbox(waiting)
+    await dead_letter_sheets_outbox(parked, "video append'i dead-letter'da")
+    SHEETS_OUTBOX_STATS["dead"] += len(parked)
+    await delete_sheets_outbox(dropped)
+    if not cells:
+        return 0, 0
+
+    try:
+        written = await ctx.sheets.update_cells(cells)
+    except Exception as e:
+        print("Sheets outbox update xato:", f"{type(e).__name__}: {e}")
+        SHEETS_OUTBOX_STATS["dead"] += await fail_sheets_outbox(ready, f"{type(e).__name__}: {e}")
+        return 0, len(ready)
+
+    SHEETS_OUTBOX_STATS["requests"] += 1
+    SHEETS_OUTBOX_STATS["cells"] += written
+    SHEETS_OUTBOX_STATS["coalesced"] += len(cells) - written
+    await delete_sheets_outbox(oid for oid, _ in ready)
+    return len(ready), 0
+
+
+async def drain_sheets_outbox(ctx: AppContext) -> tuple[int, int]:
+    """
+    Vaqti kelgan yozuvlarni partiyalab Sheets'ga chiqaradi: avval append'lar
+    (videos.sheet_row to'ladi), keyin shu qatorlarga update'lar.
+    Qaytaradi: (yozildi, xato).
+    """
+    done = failed = 0
+    while True:
+        rows = await get_due_sheets_outbox(SHEETS_OUTBOX_BATCH)
+        if not rows:
+            break
+        d1, f1 = await _flush_appends(ctx, [r for r in rows if r[1] == "append"])
+        d2, f2 = await _flush_updates(ctx, [r for r in rows if r[1] == "update"])
+        done, failed = done + d1 + d2, failed + f1 + f2
+        if f1 or f2 or len(rows) < SHEETS_OUTBOX_BATCH:
+            break
+    return done, failed
+
+
+async def run_sheets_outbox(ctx: AppContext):
+    """
+    Uzoq yashovchi task: outbox'ga yozuv tushganda yoki backoff vaqti
+    kelganda uyg'onadi. Handler'lar Google'ni kutmaydi; yozuvlar Sheets'ga
+    kamida bir marta yetadi (so'rov o'tib, javob kelmay qolsa — takrorlanishi mumkin).
+    """
+    while True:
+        SHEETS_WAKEUP.clear()
+        try:
+            await drain_sheets_outbox(ctx)
+            due = await next_sheets_outbox_due()
+            timeout = None if due is None else max(0.0, due - time.time())
+        except Exception as e:
+            # DB xatosi — aylanib qolmaslik uchun biroz kutamiz
+            print("Sheets outbox xato:", f"{type(e).__name__}: {e}")
+            timeout = SHEETS_OUTBOX_DEFER
+        try:
+            await asyncio.wait_for(SHEETS_WAKEUP.wait(), timeout)
+        except asyncio.TimeoutError:
+            continue
+        await asyncio.sleep(SHEETS_OUTBOX_LINGER)
@@ -0,0 +1,49 @@
+import asyncio
+
+
+class PendingWakeup:
+    """
+    Pending-video flusher'ni uyg'otish uchun jarayon ichidagi signal.
+      - notify():        navbatga yangi video tushdi
+      - notify_online(): Telegram'ga chiquvchi so'rov muvaffaqiyatli o'tdi
+                         (tarmoq qaytdi) — faqat flusher xatolar sababli
+                         backoff'da kutayotgan bo'lsa uyg'otadi
+    Qatorlarning o'z backoff'i (next_attempt_at) paytida har muvaffaqiyatli
+    so'rov uyg'otmaydi: flusher o'sha vaqtgacha uxlaydi.
+    """
+
+    def __init__(self):
+        self._queued = asyncio.Event()
+        self._online = asyncio.Event()
+        # flusher online_only rejimida kutyapti
+        self._waiting_online = False
+
+    def notify(self) -> None:
+        self._queued.set()
+
+    def notify_online(self) -> None:
+        if self._waiting_online:
+            self._online.set()
+
+    async def wait(self, timeout: float | None, *, online_only: bool = False) -> None:
+        """
+        Signal yoki timeout'gacha kutadi. online_only=True bo'lsa (ketma-ket
+        xatolar paytida) yangi navbat signali uyg'otmaydi, faqat tarmoq qaytgani.
+        """
+        self._online.clear()
+        event = self._online if online_only else self._queued
+        self._waiting_online = online_only
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiting_online = False
+        self._queued.clear()
+        self._online.clear()
+
+
+PENDING_WAKEUP = PendingWakeup()
+
+# Sheets outbox worker'ini uyg'otadi: outbox'ga yangi yozuv tushdi
+SHEETS_WAKEUP = asyncio.Event()
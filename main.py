@@ -1,10 +1,21 @@
 import asyncio
 
+from aiohttp import web
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from app.config import load_config
-from app.db.database import init_db
+from app.context import build_context
+from app.db.database import init_db, close_db, DRIVER_CACHE
+from app.middlewares.driver import DriverMiddleware
+from app.middlewares.outbound import (
+    OnlineSignalMiddleware,
+    RateLimitMiddleware,
+    BlockedChatMiddleware,
+)
 
 from app.handlers.admin import router as admin_router
 from app.handlers.start import router as start_router
@@ -13,14 +24,92 @@ from app.handlers.reminders import router as reminders_router
 from app.handlers.group import router as group_router
 
 from app.services.scheduler import setup_scheduler
+from app.services.flusher import run_pending_flusher
+from app.services.sheets_outbox import run_sheets_outbox
+from app.services.ratelimit import OUTBOUND_LIMITER
+from app.services.blocked import BLOCKED_DRIVERS
+from app.services.album import GROUP_ALBUMS
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, cfg) -> None:
+    """
+    Webhook rejimi: aiohttp server update'larni qabul qiladi.
+      - X-Telegram-Bot-Api-Secret-Token tekshiriladi
+      - Telegram'ga darhol 200, update fon task'ida ishlanadi
+      - WEBHOOK_URL bo'sh bo'lsa set_webhook chaqirilmaydi (lokal test:
+        yozib olingan Update JSON'ni to'g'ridan-to'g'ri POST qilish mumkin)
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=cfg.webhook_secret,
+        handle_in_background=True,
+    ).register(app, path=cfg.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    if cfg.webhook_url:
+        await bot.set_webhook(
+            url=f"{cfg.webhook_url}{cfg.webhook_path}",
+            secret_token=cfg.webhook_secret,
+            max_connections=cfg.webhook_max_connections,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=cfg.webhook_host, port=cfg.webhook_port)
+    await site.start()
+    print(f"Webhook server: http://{cfg.webhook_host}:{cfg.webhook_port}{cfg.webhook_path}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
 
 
 async def main():
     cfg = load_config()
-    await init_db()
+    await init_db(
+        readers=cfg.db_readers,
+        batch_window_ms=cfg.db_batch_window_ms,
+        batch_max_size=cfg.db_batch_max_size,
+    )
+    DRIVER_CACHE.configure(maxsize=cfg.driver_cache_size, ttl=cfg.driver_cache_ttl)
+
+    OUTBOUND_LIMITER.configure(
+        global_per_sec=cfg.rate_global_per_sec,
+        group_per_min=cfg.rate_group_per_min,
+        private_per_sec=cfg.rate_private_per_sec,
+    )
 
-    bot = Bot(token=cfg.bot_token)
-    dp = Dispatcher(storage=MemoryStorage())
+    # ixtiyoriy: guruhga videolar albom (sendMediaGroup) bilan
+    GROUP_ALBUMS.configure(
+        enabled=cfg.album_batching,
+        max_items=cfg.album_max_items,
+        delay=cfg.album_delay_ms / 1000,
+    )
+
+    session = None
+    if cfg.telegram_api_url:
+        # boshqa Bot API server (local server yoki tools/fake_bot_api.py)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(cfg.telegram_api_url))
+        print("Bot API:", cfg.telegram_api_url)
+
+    bot = Bot(token=cfg.bot_token, session=session)
+    # chiquvchi xabarlar tezligi: global + har chat token bucket, 429 qayta urinish
+    bot.session.middleware(RateLimitMiddleware())
+    # Forbidden / "chat not found" -> haydovchi nofaol (fan-out'lardan chiqadi)
+    bot.session.middleware(BlockedChatMiddleware())
+    # muvaffaqiyatli Telegram so'rovi -> pending flusher'ni uyg'otadi
+    bot.session.middleware(OnlineSignalMiddleware())
+
+    # ✅ Bir marta: config, adminlar, bot identity, Sheets, DB pool -> handlerlarga `ctx`
+    ctx = await build_context(bot, cfg)
+    dp = Dispatcher(storage=MemoryStorage(), ctx=ctx)
+
+    # Haydovchi har update'da bir marta (kesh orqali) topiladi -> handler'larga `driver`
+    dp.update.outer_middleware(DriverMiddleware())
 
     # Admin routerni eng tepada qo'ying (muhim)
     dp.include_router(admin_router)
@@ -30,12 +119,29 @@ async def main():
     dp.include_router(reminders_router)
     dp.include_router(group_router)
 
-    scheduler = setup_scheduler(bot, cfg.timezone)
+    scheduler = setup_scheduler(bot, ctx)
     scheduler.start()
 
+    flusher = asyncio.create_task(run_pending_flusher(bot, ctx))
+    # Sheets outbox: handler'lar Google'ni kutmaydi, yozuvlar partiyalab chiqadi
+    sheets_outbox = asyncio.create_task(run_sheets_outbox(ctx))
+
     print("Bot ishga tushdi. GROUP_CHAT_ID =", cfg.group_chat_id)
 
-    await dp.start_polling(bot)
+    try:
+        if cfg.bot_mode == "webhook":
+            await run_webhook(dp, bot, cfg)
+        else:
+            await dp.start_polling(bot)
+    finally:
+        flusher.cancel()
+        sheets_outbox.cancel()
+        # bekor qilingan writer bo'limlari ROLLBACK'ni pool yopilishidan oldin tugatsin
+        await asyncio.gather(flusher, sheets_outbox, return_exceptions=True)
+        scheduler.shutdown(wait=False)
+        await BLOCKED_DRIVERS.flush()
+        ctx.sheets.close()
+        await close_db()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+"""
+DB pool benchmark: har chaqiruvda yangi aiosqlite ulanish (eski usul) va
+umumiy writer/reader pool — ketma-ket chaqiruvlar soni / soniya.
+
+    python -m tools.db_pool_bench --calls 2000 --users 10000
+
+  eski  — har chaqiruv: aiosqlite.connect() + so'rov (+ commit) + yopish
+  yangi — database.get_user / database.ensure_daily_row (pool orqali)
+Pool'ning o'zini o'lchash uchun group-commit (WriteCoalescer) o'chiriladi:
+yozuvlar to'g'ridan-to'g'ri pool writer'idan o'tadi.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite  # noqa: E402
+
+from app.db import database  # noqa: E402
+
+DATE = "2026-01-01"
+
+
+async def legacy_get_user(telegram_id: int):
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        cur = await db.execute(
+            """
+            SELECT telegram_id, first_name, last_name, phone, car_plate
+            FROM users
+            WHERE telegram_id=?
+            """,
+            (telegram_id,),
+        )
+        return await cur.fetchone()
+
+
+async def legacy_ensure_daily_row(telegram_id: int, date: str) -> None:
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        await db.execute(
+            """
+            INSERT OR IGNORE INTO daily_submissions (telegram_id, date, status)
+            VALUES (?, ?, 'PENDING')
+            """,
+            (telegram_id, date),
+        )
+        await db.commit()
+
+
+async def rate(fn, calls: int, users: int) -> float:
+    ids = [random.randint(1, users) for _ in range(calls)]
+    started = time.perf_counter()
+    for i, tid in enumerate(ids):
+        await fn(tid, i)
+    return calls / (time.perf_counter() - started)
+
+
+async def main():
+    p = argparse.ArgumentParser(description="DB pool benchmark (ketma-ket chaqiruvlar)")
+    p.add_argument("--calls", type=int, default=2000)
+    p.add_argument("--users", type=int, default=10000)
+    args = p.parse_args()
+
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "pool.sqlite3")
+    await database.init_db()
+    # faqat pool: yozuvlar group-commit'siz
+    await database._coalescer.stop()
+    database._coalescer = None
+
+    async with database.get_pool().writer() as db:
+        await db.executemany(
+            "INSERT INTO users (telegram_id, first_name, last_name, phone, car_plate, registered_at) "
+            "VALUES (?, 'Ali', 'Valiyev', '+998901234567', '01A123BC', '2026-01-01T00:00:00')",
+            [(tid,) for tid in range(1, args.users + 1)],
+        )
+
+    # har qator yangi bo'lsin (INSERT OR IGNORE haqiqatan yozsin): sana chaqiruv bo'yicha
+    cases = [
+        ("get_user", lambda tid, i: legacy_get_user(tid), lambda tid, i: database.get_user(tid)),
+        (
+            "ensure_daily_row",
+            lambda tid, i: legacy_ensure_daily_row(tid, f"old-{i}"),
+            lambda tid, i: database.ensure_daily_row(tid, f"new-{i}"),
+        ),
+    ]
+
+    query_col = "so'rov"
+    print(f"{query_col:<18} {'eski /s':>10} {'yangi /s':>10} {'x':>6}")
+    for name, old_fn, new_fn in cases:
+        old = await rate(old_fn, args.calls, args.users)
+        new = await rate(new_fn, args.calls, args.users)
+        print(f"{name:<18} {old:>10.0f} {new:>10.0f} {new / old:>6.1f}")
+
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
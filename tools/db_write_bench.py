@@ -0,0 +1,78 @@
+"""
+Group-commit benchmark: --writers ta bir vaqtdagi yozuv, yozuvlar / soniya.
+
+    python -m tools.db_write_bench --writers 1000 --rounds 3
+
+  alohida NORMAL — har yozuv o'z tranzaksiyasida, synchronous=NORMAL (pool standarti)
+  alohida FULL   — har yozuv o'z tranzaksiyasida, har commit'da fsync
+  group-commit   — WriteCoalescer: batch bitta tranzaksiya, commit FULL bilan
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import database  # noqa: E402
+
+OPS = {
+    "ensure_daily_row": lambda tid, date: database.ensure_daily_row(tid, date),
+    "add_video": lambda tid, date: database.add_video(tid, date, "14", f"F{tid}"),
+    "save_reason": lambda tid, date: database.save_reason(tid, date, "buzildi"),
+}
+
+
+async def rate(op, writers: int, date: str) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(op(tid, date) for tid in range(1, writers + 1)))
+    return writers / (time.perf_counter() - started)
+
+
+async def main():
+    p = argparse.ArgumentParser(description="Group-commit yozuv benchmark'i")
+    p.add_argument("--writers", type=int, default=1000)
+    p.add_argument("--rounds", type=int, default=3, help="har o'lchov shuncha marta, eng yaxshisi olinadi")
+    p.add_argument("--db", default="", help="SQLite fayl (standart: vaqtinchalik; fsync narxi diskka bog'liq)")
+    args = p.parse_args()
+
+    database.DB_PATH = args.db or os.path.join(tempfile.mkdtemp(), "write.sqlite3")
+    await database.init_db()
+    coalescer = database._coalescer
+
+    async def per_call(sync: str):
+        database._coalescer = None
+        async with database.get_pool().writer(tx=False) as db:
+            await db.execute(f"PRAGMA synchronous={sync}")
+
+    async def grouped():
+        async with database.get_pool().writer(tx=False) as db:
+            await db.execute("PRAGMA synchronous=NORMAL")
+        database._coalescer = coalescer
+
+    modes = [("alohida NORMAL", per_call, "NORMAL"), ("alohida FULL", per_call, "FULL"), ("group-commit", None, None)]
+
+    print(f"{args.writers} ta bir vaqtdagi yozuv, yozuv/s (eng yaxshi {args.rounds} urinishdan)")
+    print(f"{'':<18}" + "".join(f"{name:>16}" for name, _, _ in modes))
+    for op_name, op in OPS.items():
+        line = f"{op_name:<18}"
+        for m, (name, setup, sync) in enumerate(modes):
+            if setup is None:
+                await grouped()
+            else:
+                await setup(sync)
+            best = 0.0
+            for r in range(args.rounds):
+                # har o'lchov yangi qatorlar yozsin
+                best = max(best, await rate(op, args.writers, f"{op_name}-{m}-{r}"))
+            line += f"{best:>16.0f}"
+        print(line)
+
+    database._coalescer = coalescer
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
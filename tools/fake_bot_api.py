@@ -0,0 +1,228 @@
+"""
+Lokal soxta Telegram Bot API (yuklama testi uchun, internet kerak emas).
+
+Qo'llab-quvvatlanadi: getUpdates, sendMessage, sendVideo, sendMediaGroup,
+answerCallbackQuery, getMe. Qolgan metodlar (deleteWebhook, ...) shunchaki
+`true` qaytaradi.
+
+Sozlanadi: javob kechikishi, 429 (Flood control) ulushi, 500 xato ulushi.
+
+Alohida ishga tushirish:
+    python -m tools.fake_bot_api --port 8081 --latency 0.05 --rate-429 0.01
+
+Bot'ni unga ulash: .env da TELEGRAM_API_URL=http://127.0.0.1:8081
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+BOT_USER = {"id": 100000, "is_bot": True, "first_name": "Fake", "username": "fake_delivery_bot"}
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class FakeBotApi:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        fail_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.fail_rate = fail_rate
+
+        self._updates: list[dict] = []
+        self._next_update_id = 1
+        self._has_updates = asyncio.Event()
+        self._message_id = 0
+
+        # (chat_id, matn bo'lagi, future) — harness bot javobini kutadi
+        self._waiters: list[tuple[int, str, asyncio.Future]] = []
+
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.sent: list[dict] = []
+
+    # --- update'lar (harness tomoni) ---
+
+    def push_update(self, update: dict) -> int:
+        update = {"update_id": self._next_update_id, **update}
+        self._next_update_id += 1
+        self._updates.append(update)
+        self._has_updates.set()
+        return update["update_id"]
+
+    def wait_for_reply(self, chat_id: int, contains: str) -> asyncio.Future:
+        """
+        Bot chat_id ga `contains` bo'lgan matn/caption yuborganda tugaydi.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((chat_id, contains, fut))
+        return fut
+
+    def _record(self, chat_id: int, message: dict) -> None:
+        self.sent.append(message)
+        text = message.get("text") or message.get("caption") or ""
+        for waiter in list(self._waiters):
+            w_chat, w_text, fut = waiter
+            if w_chat == chat_id and w_text in text:
+                self._waiters.remove(waiter)
+                if not fut.done():
+                    fut.set_result(time.perf_counter())
+
+    # --- Bot API ---
+
+    def _message(self, chat_id, **extra) -> dict:
+        self._message_id += 1
+        chat_type = "private" if isinstance(chat_id, int) and chat_id > 0 else "supergroup"
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": chat_type},
+            "from": BOT_USER,
+            **extra,
+        }
+        self._record(chat_id, message)
+        return message
+
+    @staticmethod
+    def _video(file_id: str) -> dict:
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id[-16:],
+            "width": 640,
+            "height": 360,
+            "duration": 10,
+        }
+
+    async def _get_updates(self, params: dict):
+        offset = _int(params.get("offset")) or 0
+        limit = _int(params.get("limit")) or 100
+        timeout = float(params.get("timeout") or 0)
+
+        # offset'dan kichiklari tasdiqlangan — tashlaymiz
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _dispatch(self, method: str, params: dict):
+        chat_id = _int(params.get("chat_id"))
+
+        if method == "getupdates":
+            return await self._get_updates(params)
+        if method == "getme":
+            return BOT_USER
+        if method == "sendmessage":
+            return self._message(chat_id, text=params.get("text", ""))
+        if method == "sendvideo":
+            return self._message(
+                chat_id, video=self._video(params.get("video", "")), caption=params.get("caption")
+            )
+        if method == "sendmediagroup":
+            media = params.get("media") or "[]"
+            if isinstance(media, str):
+                media = json.loads(media)
+            return [
+                self._message(chat_id, video=self._video(m.get("media", "")), caption=m.get("caption"))
+                for m in media
+            ]
+        if method == "answercallbackquery":
+            return True
+        return True
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        self.calls[method] += 1
+
+        if method != "getupdates":
+            delay = self.latency + random.uniform(0, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            roll = random.random()
+            if roll < self.rate_429:
+                self.errors["429"] += 1
+                return web.json_response(
+                    {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": f"Too Many Requests: retry after {self.retry_after}",
+                        "parameters": {"retry_after": self.retry_after},
+                    },
+                    status=429,
+                )
+            if roll < self.rate_429 + self.fail_rate:
+                self.errors["500"] += 1
+                return web.json_response(
+                    {"ok": False, "error_code": 500, "description": "Internal Server Error"},
+                    status=500,
+                )
+
+        result = await self._dispatch(method, params)
+        return web.json_response({"ok": True, "result": result})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/bot{token}/{method}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, host=host, port=port).start()
+        return runner
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Soxta Telegram Bot API server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency", type=float, default=0.0, help="har javob kechikishi (s)")
+    p.add_argument("--jitter", type=float, default=0.0, help="qo'shimcha tasodifiy kechikish (s)")
+    p.add_argument("--rate-429", type=float, default=0.0, help="429 qaytarish ulushi (0..1)")
+    p.add_argument("--retry-after", type=int, default=1)
+    p.add_argument("--fail-rate", type=float, default=0.0, help="500 qaytarish ulushi (0..1)")
+    return p.parse_args(argv)
+
+
+async def main():
+    args = parse_args()
+    api = FakeBotApi(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        fail_rate=args.fail_rate,
+    )
+    await api.start(args.host, args.port)
+    print(f"Fake Bot API: http://{args.host}:{args.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,257 @@
+"""
+Lokal soxta Google Sheets API (v4) + OAuth token endpoint — benchmark uchun.
+
+Qo'llab-quvvatlanadi:
+  POST /token                                    service account JWT -> access_token
+  GET  /v4/spreadsheets/{id}                     metadata
+  GET  /v4/spreadsheets/{id}/values/{range}      qiymatlar (get_all_values)
+  PUT  /v4/spreadsheets/{id}/values/{range}      update_cell / update
+  POST /v4/spreadsheets/{id}/values/{range}:append
+  POST /v4/spreadsheets/{id}/values:batchUpdate
+
+Ishlatish (bitta jarayonda):
+    api = FakeSheetsApi(latency=0.02)
+    base = await api.start(port=8082)
+    point_gspread_at(base)                 # gspread so'rovlari shu serverga
+    os.environ["GOOGLE_CREDS_JSON"] = json.dumps(fake_service_account(base))
+"""
+import asyncio
+import random
+import re
+import time
+from collections import Counter
+from urllib.parse import unquote
+
+from aiohttp import web
+
+GSPREAD_REAL_BASE = "https://sheets.googleapis.com/v4/spreadsheets"
+
+_A1_CELL = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _col_letters(n: int) -> str:
+    out = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        out = chr(65 + r) + out
+    return out
+
+
+def _split_range(rng: str) -> tuple[str, str]:
+    rng = unquote(rng)
+    if "!" in rng:
+        title, cells = rng.rsplit("!", 1)
+    else:
+        title, cells = rng, ""
+    return title.strip("'"), cells
+
+
+def _cell(ref: str) -> tuple[int, int]:
+    m = _A1_CELL.match(ref)
+    if not m:
+        raise ValueError(ref)
+    return int(m.group(2)), _col_index(m.group(1))
+
+
+class FakeSheetsApi:
+    def __init__(self, latency: float = 0.0, rate_429: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.fail_rate = fail_rate
+        # (spreadsheet_id, title) -> qatorlar
+        self.sheets: dict[tuple[str, str], list[list[str]]] = {}
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.base_url = ""
+
+    def seed(self, spreadsheet_id: str, title: str, rows: int, cols: int = 10) -> None:
+        self.sheets[(spreadsheet_id, title)] = [
+            [f"r{r}c{c}" for c in range(1, cols + 1)] for r in range(1, rows + 1)
+        ]
+
+    def _rows(self, spreadsheet_id: str, title: str) -> list[list[str]]:
+        return self.sheets.setdefault((spreadsheet_id, title), [])
+
+    # --- handlers ---
+
+    async def token(self, request: web.Request) -> web.Response:
+        self.calls["token"] += 1
+        return web.json_response(
+            {"access_token": f"fake-{time.time_ns()}", "expires_in": 3600, "token_type": "Bearer"}
+        )
+
+    async def spreadsheets(self, request: web.Request) -> web.Response:
+        tail = request.match_info["tail"]
+        method = request.method
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        roll = random.random()
+        if roll < self.rate_429:
+            self.errors["429"] += 1
+            return web.json_response(
+                {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}},
+                status=429,
+            )
+        if roll < self.rate_429 + self.fail_rate:
+            self.errors["503"] += 1
+            return web.json_response(
+                {"error": {"code": 503, "message": "Backend Error", "status": "UNAVAILABLE"}},
+                status=503,
+            )
+
+        sid, _, rest = tail.partition("/")
+        body = await request.json() if request.can_read_body else {}
+
+        if ":" in sid and not rest:
+            sid, _, action = sid.partition(":")
+            if action == "batchUpdate":
+                self.calls["batchUpdate"] += 1
+                return web.json_response({"spreadsheetId": sid, "replies": []})
+
+        if not rest:
+            self.calls["metadata"] += 1
+            titles = sorted({t for (s, t) in self.sheets if s == sid}) or ["Logs"]
+            return web.json_response(
+                {
+                    "spreadsheetId": sid,
+                    "properties": {"title": "Fake", "locale": "en_US", "timeZone": "Asia/Tashkent"},
+                    "sheets": [
+                        {
+                            "properties": {
+                                "sheetId": i,
+                                "title": t,
+                                "index": i,
+                                "sheetType": "GRID",
+                                "gridProperties": {
+                                    "rowCount": max(1000, len(self._rows(sid, t))),
+                                    "columnCount": 26,
+                                },
+                            }
+                        }
+                        for i, t in enumerate(titles)
+                    ],
+                }
+            )
+
+        if rest == "values:batchUpdate":
+            self.calls["values.batchUpdate"] += 1
+            total = 0
+            for item in body.get("data", []):
+                total += self._write(sid, item["range"], item.get("values", []))
+            return web.json_response({"spreadsheetId": sid, "totalUpdatedCells": total})
+
+        if rest.startswith("values/"):
+            rng = rest[len("values/"):]
+            if rng.endswith(":append"):
+                self.calls["values.append"] += 1
+                title, _ = _split_range(rng[: -len(":append")])
+                rows = self._rows(sid, title)
+                values = body.get("values", [])
+                first = len(rows) + 1
+                rows.extend([[str(v) for v in row] for row in values])
+                last = len(rows)
+                width = max((len(r) for r in values), default=1)
+                updated = f"'{title}'!A{first}:{_col_letters(width)}{last}"
+                return web.json_response(
+                    {
+                        "spreadsheetId": sid,
+                        "tableRange": f"'{title}'!A1:{_col_letters(width)}{first - 1}",
+                        "updates": {
+                            "spreadsheetId": sid,
+                            "updatedRange": updated,
+                            "updatedRows": len(values),
+                            "updatedColumns": width,
+                            "updatedCells": len(values) * width,
+                        },
+                    }
+                )
+            if method == "GET":
+                self.calls["values.get"] += 1
+                title, _ = _split_range(rng)
+                return web.json_response(
+                    {"range": f"'{title}'!A1:Z{len(self._rows(sid, title))}", "majorDimension": "ROWS",
+                     "values": self._rows(sid, title)}
+                )
+            if method == "PUT":
+                self.calls["values.update"] += 1
+                cells = self._write(sid, rng, body.get("values", []))
+                return web.json_response({"spreadsheetId": sid, "updatedRange": unquote(rng), "updatedCells": cells})
+
+        return web.json_response({"error": {"code": 404, "message": "Not found"}}, status=404)
+
+    def _write(self, sid: str, rng: str, values: list) -> int:
+        title, cells = _split_range(rng)
+        start = cells.split(":")[0] or "A1"
+        row0, col0 = _cell(start)
+        rows = self._rows(sid, title)
+        n = 0
+        for dr, vals in enumerate(values):
+            r = row0 + dr
+            while len(rows) < r:
+                rows.append([])
+            row = rows[r - 1]
+            for dc, v in enumerate(vals):
+                c = col0 + dc
+                while len(row) < c:
+                    row.append("")
+                row[c - 1] = str(v)
+                n += 1
+        return n
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/token", self.token)
+        app.router.add_route("*", "/v4/spreadsheets/{tail:.*}", self.spreadsheets)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8082) -> str:
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, host=host, port=port).start()
+        self.runner = runner
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+
+def point_gspread_at(base_url: str) -> None:
+    """
+    gspread URL konstantalarini soxta serverga burish (faqat benchmark uchun).
+    """
+    import gspread.http_client as hc
+
+    for name in dir(hc):
+        value = getattr(hc, name)
+        if name.startswith("SPREADSHEET") and isinstance(value, str) and value.startswith(GSPREAD_REAL_BASE):
+            setattr(hc, name, value.replace(GSPREAD_REAL_BASE, f"{base_url}/v4/spreadsheets"))
+
+
+def fake_service_account(base_url: str) -> dict:
+    """
+    Soxta service account: haqiqiy RSA kalit (JWT imzolash uchun), token_uri — soxta server.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    return {
+        "type": "service_account",
+        "project_id": "fake",
+        "private_key_id": "fake",
+        "private_key": pem,
+        "client_email": "bot@fake.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": f"{base_url}/token",
+    }
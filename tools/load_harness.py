@@ -0,0 +1,209 @@
+"""
+End-to-end yuklama testi: haqiqiy bot (main.main, polling) soxta Bot API'ga ulanadi,
+N ta haydovchi ro'yxatdan o'tadi, video yuboradi va eslatmaga javob beradi.
+
+Har qadam uchun: update soxta API'ga qo'yilgandan bot javobi kelgunicha vaqt.
+Natija: p50/p95/p99 handler latency va update/s.
+
+    python -m tools.load_harness --drivers 200 --concurrency 50 --latency 0.03
+
+Sheets yozuvlari outbox'ga tushadi, handlerlar Google'ni kutmaydi
+(GOOGLE_CREDS_JSON ulanmagan bo'lsa outbox worker backoff bilan kutadi).
+Telegram tezlik cheklovlari (global 30/s, guruh 20/daqiqa, shaxsiy 1/s) botning
+o'z imkoniyatini bosib ketmasligi uchun RATE_* standart holda baland qo'yiladi;
+haqiqiy cheklovlar bilan o'lchash uchun env orqali bering.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fake_bot_api import FakeBotApi  # noqa: E402
+
+GROUP_CHAT_ID = -1001234567890
+DRIVER_ID_BASE = 5_000_000
+
+
+def _user(tid: int) -> dict:
+    return {"id": tid, "is_bot": False, "first_name": f"Driver{tid}"}
+
+
+def _message(tid: int, **extra) -> dict:
+    return {
+        "message": {
+            "message_id": int(time.time() * 1000) % 1_000_000_000,
+            "date": int(time.time()),
+            "chat": {"id": tid, "type": "private"},
+            "from": _user(tid),
+            **extra,
+        }
+    }
+
+
+def _callback(tid: int, data: str) -> dict:
+    return {
+        "callback_query": {
+            "id": f"{tid}-{data}-{time.monotonic_ns()}",
+            "from": _user(tid),
+            "chat_instance": str(tid),
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": tid, "type": "private"},
+                "from": {"id": 100000, "is_bot": True, "first_name": "Fake"},
+                "text": "...",
+            },
+        }
+    }
+
+
+def driver_script(tid: int) -> list[tuple[str, dict, str]]:
+    """
+    (qadam nomi, update, bot javobida bo'lishi kerak bo'lgan matn)
+    """
+    return [
+        ("start", _message(tid, text="/start"), "Davom etish"),
+        ("onboard", _callback(tid, "onboard_ok"), "Исмингизни"),
+        ("first_name", _message(tid, text="Ali"), "Фамилиянгизни"),
+        ("last_name", _message(tid, text="Valiyev"), "Телефон"),
+        (
+            "contact",
+            _message(tid, contact={"phone_number": f"+99890{tid % 10_000_000:07d}", "first_name": "Ali", "user_id": tid}),
+            "Автомашина",
+        ),
+        ("car_plate", _message(tid, text="01A123BC"), "Рўйхатдан"),
+        ("video_menu", _message(tid, text="🎥 Video yuborish"), "Videoni yuboring"),
+        (
+            "video",
+            _message(
+                tid,
+                video={"file_id": f"VID{tid}", "file_unique_id": f"U{tid}", "width": 640, "height": 360, "duration": 10},
+                caption="14",
+            ),
+            "Video qabul qilindi",
+        ),
+        ("reminder_no", _callback(tid, "rem_no"), "Sababini yozing"),
+        ("reason", _message(tid, text="Mashina buzildi"), "Sabab saqlandi"),
+    ]
+
+
+async def run_driver(api: FakeBotApi, tid: int, latencies: dict, timeout: float) -> bool:
+    for step, update, expect in driver_script(tid):
+        reply = api.wait_for_reply(tid, expect)
+        started = time.perf_counter()
+        api.push_update(update)
+        try:
+            done = await asyncio.wait_for(reply, timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱ {tid}: '{step}' javobi {timeout}s ichida kelmadi")
+            return False
+        latencies[step].append(done - started)
+    return True
+
+
+def pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def report(latencies: dict, updates: int, took: float, api: FakeBotApi) -> None:
+    print()
+    print(f"{'qadam':<12} {'soni':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    every = []
+    for step, values in latencies.items():
+        every += values
+        print(
+            f"{step:<12} {len(values):>6} {pct(values, 50) * 1000:>9.1f} "
+            f"{pct(values, 95) * 1000:>9.1f} {pct(values, 99) * 1000:>9.1f}"
+        )
+    print(
+        f"{'JAMI':<12} {len(every):>6} {pct(every, 50) * 1000:>9.1f} "
+        f"{pct(every, 95) * 1000:>9.1f} {pct(every, 99) * 1000:>9.1f}"
+    )
+    print()
+    print(f"Update'lar: {updates}, vaqt: {took:.1f}s, {updates / took if took else 0:.1f} update/s")
+    print("Bot API chaqiruvlari:", dict(api.calls))
+    if api.errors:
+        print("Soxta xatolar:", dict(api.errors))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Bot uchun end-to-end yuklama testi")
+    p.add_argument("--drivers", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=20, help="bir vaqtda faol haydovchilar")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency", type=float, default=0.02, help="soxta API kechikishi (s)")
+    p.add_argument("--jitter", type=float, default=0.01)
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--fail-rate", type=float, default=0.0)
+    p.add_argument("--step-timeout", type=float, default=30.0)
+    p.add_argument("--db", default="", help="SQLite fayl (standart: vaqtinchalik)")
+    return p.parse_args(argv)
+
+
+async def main():
+    args = parse_args()
+
+    api = FakeBotApi(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        fail_rate=args.fail_rate,
+    )
+    runner = await api.start(port=args.port)
+
+    os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["BOT_MODE"] = "polling"
+    os.environ.setdefault("BOT_TOKEN", "100000:FAKE-TOKEN")
+    os.environ.setdefault("SHEET_ID", "fake-sheet")
+    os.environ.setdefault("GROUP_CHAT_ID", str(GROUP_CHAT_ID))
+    os.environ.setdefault("RATE_GLOBAL_PER_SEC", "100000")
+    os.environ.setdefault("RATE_GROUP_PER_MIN", "100000")
+    os.environ.setdefault("RATE_PRIVATE_PER_SEC", "1000")
+
+    from app.db import database
+    import main as bot_main
+
+    database.DB_PATH = args.db or os.path.join(tempfile.mkdtemp(), "load.sqlite3")
+    bot_task = asyncio.create_task(bot_main.main())
+
+    # bot polling'ni boshlaguncha
+    while not api.calls["getupdates"]:
+        if bot_task.done():
+            bot_task.result()
+        await asyncio.sleep(0.05)
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(tid: int) -> bool:
+        async with sem:
+            return await run_driver(api, tid, latencies, args.step_timeout)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(DRIVER_ID_BASE + i) for i in range(args.drivers)))
+    took = time.perf_counter() - started
+
+    updates = sum(len(v) for v in latencies.values())
+    report(latencies, updates, took, api)
+    print(f"Tugatgan haydovchilar: {sum(results)} / {args.drivers}")
+
+    # operator Ctrl+C bosgandek: polling to'xtaydi, main() finally'si ishlaydi
+    signal.raise_signal(signal.SIGINT)
+    await bot_task
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
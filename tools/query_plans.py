@@ -0,0 +1,294 @@
+"""
+EXPLAIN QUERY PLAN tekshiruvi: katta (1M video) DB'da database.py'dagi har
+so'rov indeks / rowid orqali ishlashini tekshiradi.
+
+    python -m tools.query_plans --videos 1000000 --users 10000
+
+Qadamlar:
+  1) vaqtinchalik DB: migratsiyalar + seed (users, videos -> trigger'lar daily
+     qatorlarni to'ldiradi, pending_videos, sheets_outbox, bitta eski oy arxivga)
+  2) database.py'dagi har public coroutine chaqiriladi (qaysidir biri
+     CALLS'da bo'lmasa — xato), pool ulanishlaridagi barcha SQL trace qilinadi
+  3) har so'rov (+ trigger tanalari) uchun EXPLAIN QUERY PLAN; ruxsat
+     berilmagan SCAN bo'lsa exit code 1
+
+Ruxsat berilgan SCAN'lar — ALLOWED_SCANS (ataylab butun parkni o'qiydiganlar).
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date as date_cls, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import database  # noqa: E402
+from app.db.archive import archive_closed_months, archive_dir  # noqa: E402
+
+TODAY = date_cls(2026, 3, 31)
+HOT_DAYS = 90
+# shu oy archive_closed_months bilan arxivga ko'chadi (_daily_union arxiv sxemasi bilan)
+OLD_MONTH = "2025-12"
+
+# Ataylab butun jadvalni o'qiydiganlar: (jadval, sabab)
+ALLOWED_SCANS = {
+    "users": "butun park: seed_daily_rows va kunlik hisobot hamma faol haydovchini o'qiydi",
+}
+
+# Trace'dagi bular so'rov emas
+SKIP_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "ATTACH", "DETACH", "--")
+
+_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+([\w.]+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NEW_OLD = re.compile(r"\b(?:NEW|OLD)\.\w+", re.IGNORECASE)
+_TRIGGER_BODY = re.compile(r"\bBEGIN\b(.*)\bEND\s*$", re.IGNORECASE | re.DOTALL)
+_KEYWORDS = {"where", "on", "join", "left", "inner", "group", "order", "limit", "union", "set", "using"}
+
+
+def seed(path: str, users: int, videos: int) -> None:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO users (telegram_id, first_name, last_name, phone, car_plate, registered_at, active) "
+        "VALUES (?, 'Ali', 'Valiyev', '+998901234567', '01A123BC', '2025-01-01T00:00:00', ?)",
+        ((tid, int(tid % 50 != 0)) for tid in range(1, users + 1)),
+    )
+
+    hot = [(TODAY - timedelta(days=d)).isoformat() for d in range(HOT_DAYS)]
+    old = [f"{OLD_MONTH}-{d:02d}" for d in range(1, 29)]
+    old_share = max(1, videos // 100)
+
+    def rows():
+        for i in range(videos):
+            day = random.choice(old) if i < old_share else random.choice(hot)
+            yield (random.randint(1, users), day, "14", f"F{i}", i + 2, f"{day}T10:00:00")
+
+    conn.executemany(
+        "INSERT INTO videos (telegram_id, date, kindergarten_no, video_file_id, sheet_row, submitted_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows(),
+    )
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO pending_videos (telegram_id, date, kindergarten_no, video_file_id, created_at, attempts, "
+        "next_attempt_at, lease_until, payload) VALUES (?, ?, '14', ?, '2026-03-31T10:00:00', 0, ?, 0, '{}')",
+        ((random.randint(1, users), TODAY.isoformat(), f"P{i}", now + random.uniform(-60, 3600)) for i in range(5000)),
+    )
+    conn.executemany(
+        "INSERT INTO sheets_outbox (kind, video_id, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+        (
+            ("update", random.randint(1, videos), '{"col":9,"value":"YUBORDIM"}', "2026-03-31T10:00:00",
+             now + random.uniform(-60, 3600))
+            for _ in range(5000)
+        ),
+    )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def build_calls(today: str) -> dict:
+    """
+    database.py'dagi har public coroutine -> uni chaqiradigan funksiya.
+    """
+    sheet_row = ["2026-03-31 10:00:00", today, "Ali", "Valiyev", "+998901234567", "01A123BC", "14", "L", "", ""]
+    archived = f"{OLD_MONTH}-15"
+
+    async def pending_cycle():
+        rows = await database.claim_pending_videos(limit=5)
+        return rows
+
+    return {
+        "upsert_user": lambda: database.upsert_user(7, "Ali", "Valiyev", "+998901234567", "01A123BC"),
+        "get_user": lambda: database.get_user(7),
+        "get_driver": lambda: database.get_driver(8),
+        "deactivate_drivers": lambda: database.deactivate_drivers([9, 10]),
+        "reactivate_driver": lambda: database.reactivate_driver(9),
+        "ensure_daily_row": lambda: database.ensure_daily_row(
+            7, today, sheet_event=sheet_row, sheet_cells={9: "YUBORDIM"}
+        ),
+        "seed_daily_rows": lambda: database.seed_daily_rows(today),
+        "get_pending_driver_ids": lambda: database.get_pending_driver_ids(today, after=100),
+        "start_reminder_run": lambda: database.start_reminder_run(today, "18:00"),
+        "checkpoint_reminder_run": lambda: database.checkpoint_reminder_run(today, "18:00", 500, 10, 1, 0),
+        "get_unfinished_reminder_slots": lambda: database.get_unfinished_reminder_slots(today),
+        "save_reason": lambda: database.save_reason(
+            7, today, "buzildi", sheet_event=sheet_row, sheet_cells={9: "YUBORMADIM", 10: "buzildi"}
+        ),
+        "add_video": lambda: database.add_video(7, today, "14", "FNEW", sheet_append=sheet_row),
+        "count_videos_for_user_date": lambda: database.count_videos_for_user_date(7, today),
+        "get_daily_summary": lambda: database.get_daily_summary(7, today),
+        "get_report_rows_for_date": lambda: database.get_report_rows_for_date(archived),
+        "get_senders_for_date": lambda: database.get_senders_for_date(today),
+        "enqueue_pending_video": lambda: database.enqueue_pending_video(
+            7, today, "14", "FQ", caption="c", parse_mode="HTML", sheet_fields={}
+        ),
+        "claim_pending_videos": pending_cycle,
+        "next_pending_due": database.next_pending_due,
+        "fail_pending_video": lambda: database.fail_pending_video(1, 0, "test"),
+        "dead_letter_pending_video": lambda: database.dead_letter_pending_video(2, "test"),
+        "delete_pending_video": lambda: database.delete_pending_video(3),
+        "get_due_sheets_outbox": lambda: database.get_due_sheets_outbox(200),
+        "next_sheets_outbox_due": database.next_sheets_outbox_due,
+        "complete_sheets_appends": lambda: database.complete_sheets_appends([(1, 5, 100)]),
+        "get_video_sheet_rows": lambda: database.get_video_sheet_rows([5, 6, 7]),
+        "delete_sheets_outbox": lambda: database.delete_sheets_outbox([2, 3]),
+        "defer_sheets_outbox": lambda: database.defer_sheets_outbox([(4, 1.0), (5, 1.0)]),
+        "dead_letter_sheets_outbox": lambda: database.dead_letter_sheets_outbox([8], "test"),
+        # ikkinchisi dead-letter'ga ko'chadi
+        "fail_sheets_outbox": lambda: database.fail_sheets_outbox(
+            [(6, 0), (7, database.SHEETS_MAX_ATTEMPTS - 1)], "test"
+        ),
+        "delete_user_by_telegram_id": lambda: database.delete_user_by_telegram_id(11),
+        # database.py tashqarisi: arxiv job'i (eski oy ko'chadi, keyin hisobot uni ATTACH qiladi)
+        "archive_closed_months": lambda: archive_closed_months(database.get_pool(), keep_days=60, today=TODAY),
+    }
+
+
+def public_db_functions() -> set[str]:
+    return {
+        name
+        for name, fn in vars(database).items()
+        if inspect.iscoroutinefunction(fn)
+        and fn.__module__ == database.__name__
+        and not name.startswith("_")
+        and name not in ("init_db", "close_db")
+    }
+
+
+def trigger_statements(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+    """
+    Trigger tanasidagi so'rovlar (NEW./OLD. qiymatlari literal bilan almashtiriladi).
+    """
+    out = []
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'"):
+        m = _TRIGGER_BODY.search(sql)
+        if not m:
+            continue
+        for stmt in m.group(1).split(";"):
+            stmt = stmt.strip()
+            if stmt:
+                out.append((f"trigger {name}", _NEW_OLD.sub("'0'", stmt)))
+    return out
+
+
+def alias_map(sql: str) -> dict[str, str]:
+    aliases = {}
+    for table, alias in _ALIAS.findall(sql):
+        table = table.split(".")[-1]
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def bad_scans(conn: sqlite3.Connection, sql: str) -> list[str]:
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    subqueries = set()
+    for _, _, _, detail in plan:
+        m = re.match(r"(?:CO-ROUTINE|MATERIALIZE)\s+(\w+)", detail)
+        if m:
+            subqueries.add(m.group(1))
+
+    aliases = alias_map(sql)
+    bad = []
+    for _, _, _, detail in plan:
+        m = re.match(r"SCAN\s+(\w+)", detail)
+        if not m:
+            continue
+        name = m.group(1)
+        if name == "CONSTANT" or name in subqueries:
+            continue
+        if aliases.get(name, name) in ALLOWED_SCANS:
+            continue
+        bad.append(detail)
+    return bad
+
+
+async def main():
+    p = argparse.ArgumentParser(description="database.py so'rovlari uchun EXPLAIN QUERY PLAN tekshiruvi")
+    p.add_argument("--videos", type=int, default=1_000_000)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--verbose", action="store_true", help="har so'rov rejasini chiqarish")
+    args = p.parse_args()
+
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "plans.sqlite3")
+    await database.init_db()
+    await database.close_db()
+
+    started = time.perf_counter()
+    seed(database.DB_PATH, args.users, args.videos)
+    print(f"Seed: {args.videos} video, {args.users} user — {time.perf_counter() - started:.1f}s")
+
+    await database.init_db()
+    pool = database.get_pool()
+    statements: list[tuple[str, str]] = []
+    current = {"fn": ""}
+
+    def trace(sql: str) -> None:
+        statements.append((current["fn"], sql))
+
+    for conn in (pool._writer, *pool._readers):
+        await conn.set_trace_callback(trace)
+
+    calls = build_calls(TODAY.isoformat())
+    missing = public_db_functions() - set(calls)
+    if missing:
+        print("❌ CALLS'da yo'q funksiyalar:", ", ".join(sorted(missing)))
+        sys.exit(1)
+
+    for name, call in calls.items():
+        current["fn"] = name
+        await call()
+    await database.close_db()
+
+    check = sqlite3.connect(database.DB_PATH)
+    for fname in sorted(os.listdir(archive_dir(database.DB_PATH))):
+        m = re.match(r"archive_(\d{4}_\d{2})\.sqlite3$", fname)
+        if m:
+            check.execute(
+                f"ATTACH DATABASE ? AS arch_{m.group(1)}",
+                (os.path.join(archive_dir(database.DB_PATH), fname),),
+            )
+
+    seen = set()
+    queries = []
+    for fn, sql in statements + trigger_statements(check):
+        sql = sql.strip()
+        if not sql or sql.upper().startswith(SKIP_PREFIXES) or sql.upper().startswith("CREATE"):
+            continue
+        # bir xil shakldagi so'rovni (faqat qiymatlari farqli) bir marta tekshiramiz
+        shape = re.sub(r"'[^']*'|\b\d+(?:\.\d+)?\b", "?", sql)
+        if shape in seen:
+            continue
+        seen.add(shape)
+        queries.append((fn, sql))
+
+    failed = 0
+    for fn, sql in queries:
+        bad = bad_scans(check, sql)
+        one_line = " ".join(sql.split())
+        if bad:
+            failed += 1
+            print(f"❌ {fn}: {one_line[:140]}")
+            for detail in bad:
+                print(f"     {detail}")
+        elif args.verbose:
+            print(f"✅ {fn}: {one_line[:140]}")
+            for _, _, _, detail in check.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                print(f"     {detail}")
+
+    print(f"So'rovlar: {len(queries)} ({len(calls)} funksiya), ruxsatsiz SCAN: {failed}")
+    for table, why in ALLOWED_SCANS.items():
+        print(f"  ruxsat: SCAN {table} — {why}")
+    if failed:
+        sys.exit(1)
+    print("✅ Ruxsatsiz full scan yo'q")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
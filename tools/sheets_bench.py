@@ -0,0 +1,82 @@
+"""
+Sheets append benchmark: soxta Sheets API'da varaq o'sib borganda
+bitta video qatori append'i kechikishi qanday o'zgaradi.
+
+    python -m tools.sheets_bench --rows 1000 10000 100000 --appends 30
+
+"eski" ustun — append'dan keyin len(get_all_values()) (avvalgi usul),
+"yangi" — qator raqami append javobidagi updatedRange'dan.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fake_sheets_api import FakeSheetsApi, fake_service_account, point_gspread_at  # noqa: E402
+
+FIELDS = dict(
+    first_name="Ali",
+    last_name="Valiyev",
+    phone="+998901234567",
+    car_plate="01A123BC",
+    date_str="2026-01-01",
+    kindergarten_no="14",
+    video_link="https://t.me/c/1/1",
+)
+
+
+def _ms(values: list[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0] * 1000
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000
+
+
+async def main():
+    p = argparse.ArgumentParser(description="Sheets append benchmark (soxta API)")
+    p.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--appends", type=int, default=30)
+    p.add_argument("--latency", type=float, default=0.01, help="soxta API kechikishi (s)")
+    p.add_argument("--port", type=int, default=8082)
+    args = p.parse_args()
+
+    api = FakeSheetsApi(latency=args.latency)
+    base = await api.start(port=args.port)
+    point_gspread_at(base)
+    os.environ["GOOGLE_CREDS_JSON"] = json.dumps(fake_service_account(base))
+
+    from app.services import sheets
+
+    print(f"{'qatorlar':>9} {'eski p50':>10} {'eski p95':>10} {'yangi p50':>10} {'yangi p95':>10}  ms")
+    for i, rows in enumerate(args.rows):
+        sheet_id = f"bench-{i}"
+        api.seed(sheet_id, "Logs", rows)
+        cfg = sheets.SheetsConfig(sheet_id=sheet_id)
+        ws = await asyncio.to_thread(sheets.get_session().worksheet, sheet_id, "Logs")
+
+        def legacy_append():
+            ws.append_row(list(FIELDS.values()), value_input_option="USER_ENTERED")
+            return len(ws.get_all_values())
+
+        old, new = [], []
+        for _ in range(args.appends):
+            t = time.perf_counter()
+            await asyncio.to_thread(legacy_append)
+            old.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            row = await asyncio.to_thread(sheets.append_rows, cfg, [sheets.video_row(cfg.timezone, **FIELDS)])
+            new.append(time.perf_counter() - t)
+
+        assert row == len(api.sheets[(sheet_id, "Logs")]), "qator raqami noto'g'ri"
+        print(f"{rows:>9} {_ms(old, 50):>10.1f} {_ms(old, 95):>10.1f} {_ms(new, 50):>10.1f} {_ms(new, 95):>10.1f}")
+
+    print("Sheets API chaqiruvlari:", dict(api.calls))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
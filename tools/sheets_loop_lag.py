@@ -0,0 +1,122 @@
+"""
+Sheets sekin javob berganda event loop qotib qolmasligini tekshiradi.
+
+Soxta Sheets API (alohida thread'da) har so'rovga --latency soniya kechikadi.
+Bir vaqtda --calls ta append yuboriladi, shu paytda ticker har 10 ms da loop
+kechikishini (lag) o'lchaydi.
+
+    python -m tools.sheets_loop_lag --latency 1.0 --calls 10
+
+  sync  — eski usul: gspread to'g'ridan-to'g'ri coroutine ichida
+  async — AsyncSheets (thread pool) orqali
+async rejimida max lag >= --max-lag-ms bo'lsa, exit code 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fake_sheets_api import FakeSheetsApi, fake_service_account, point_gspread_at  # noqa: E402
+
+FIELDS = dict(
+    first_name="Ali",
+    last_name="Valiyev",
+    phone="+998901234567",
+    car_plate="01A123BC",
+    date_str="2026-01-01",
+    kindergarten_no="14",
+    video_link="https://t.me/c/1/1",
+)
+
+TICK = 0.01
+
+
+def start_fake_api_thread(api: FakeSheetsApi, port: int) -> str:
+    started = threading.Event()
+    box = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        box["base"] = loop.run_until_complete(api.start(port=port))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return box["base"]
+
+
+async def measure(work) -> tuple[float, float]:
+    """
+    work() davomida loop lag'ini o'lchaydi. Qaytaradi: (max lag, ish vaqti), soniya.
+    """
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - t - TICK)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await work()
+    took = time.perf_counter() - started
+    done.set()
+    await tick
+    return max(lags, default=0.0), took
+
+
+async def main():
+    p = argparse.ArgumentParser(description="Sheets sekinligida event loop lag tekshiruvi")
+    p.add_argument("--latency", type=float, default=1.0)
+    p.add_argument("--calls", type=int, default=10)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--max-lag-ms", type=float, default=50)
+    p.add_argument("--port", type=int, default=8083)
+    args = p.parse_args()
+
+    api = FakeSheetsApi(latency=args.latency)
+    base = start_fake_api_thread(api, args.port)
+    point_gspread_at(base)
+    os.environ["GOOGLE_CREDS_JSON"] = json.dumps(fake_service_account(base))
+
+    from app.services import sheets
+    from app.services.sheets_async import AsyncSheets
+
+    cfg = sheets.SheetsConfig(sheet_id="lag")
+    # token va worksheet handle oldindan (o'lchovga kirmasin)
+    sheets.get_session().worksheet("lag", "Logs")
+
+    async def sync_work():
+        for _ in range(args.calls):
+            sheets.append_rows(cfg, [sheets.video_row(cfg.timezone, **FIELDS)])
+            await asyncio.sleep(0)
+
+    facade = AsyncSheets(cfg, max_workers=args.workers, timeout=args.latency * args.calls + 10)
+
+    async def async_work():
+        await asyncio.gather(*(facade.append_rows([facade.video_row(**FIELDS)]) for _ in range(args.calls)))
+
+    sync_lag, sync_took = await measure(sync_work)
+    async_lag, async_took = await measure(async_work)
+    facade.close()
+
+    print(f"{'rejim':<6} {'max lag ms':>11} {'vaqt s':>8}")
+    print(f"{'sync':<6} {sync_lag * 1000:>11.1f} {sync_took:>8.2f}")
+    print(f"{'async':<6} {async_lag * 1000:>11.1f} {async_took:>8.2f}")
+
+    if async_lag * 1000 >= args.max_lag_ms:
+        print(f"❌ async lag {async_lag * 1000:.1f} ms >= {args.max_lag_ms} ms")
+        sys.exit(1)
+    print(f"✅ async lag < {args.max_lag_ms} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+18:00 eslatma to'lqini: haydovchilar "YUBORDIM" / "YUBORMADIM" tugmalarini
+(ba'zilari bir necha marta) bosganda Sheets'ga nechta so'rov ketadi.
+
+    python -m tools.sheets_wave_bench --drivers 300 --duration 5
+
+  eski  — har bosish: hodisa append'i + katakcha update'i (sabab bo'lsa yana bittasi)
+  yangi — outbox: append'lar bitta values.append, katakchalar (qator, ustun)
+          bo'yicha birlashtirilib bitta values:batchUpdate
+Oxirida Sheets'dagi katakchalar har haydovchining oxirgi bosishiga tengligi tekshiriladi.
+
+Kvota (standart holda cheklanmagan, eski rejim ham o'lchansin):
+    python -m tools.sheets_wave_bench --budget 60 --rate-429 0.1 --skip-old
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fake_sheets_api import FakeSheetsApi, fake_service_account, point_gspread_at  # noqa: E402
+
+DATE = "2026-01-01"
+DRIVER = dict(first_name="Ali", last_name="Valiyev", phone="+998901234567", car_plate="01A123BC", date_str=DATE)
+
+
+def make_taps(drivers: int, max_taps: int, duration: float) -> list[tuple[float, int, str, str]]:
+    """
+    (vaqt, telegram_id, action, reason) — vaqt bo'yicha tartiblangan.
+    """
+    taps = []
+    for tid in range(1, drivers + 1):
+        for _ in range(random.randint(1, max_taps)):
+            if random.random() < 0.7:
+                taps.append((random.uniform(0, duration), tid, "YUBORDIM", ""))
+            else:
+                taps.append((random.uniform(0, duration), tid, "YUBORMADIM", random.choice(["buzildi", "kasal", "tirbandlik"])))
+    return sorted(taps)
+
+
+async def play(taps, duration: float, fn) -> None:
+    started = time.perf_counter()
+    pending = []
+    for at, tid, action, reason in taps:
+        wait = at - (time.perf_counter() - started)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        pending.append(asyncio.create_task(fn(tid, action, reason)))
+    await asyncio.gather(*pending)
+
+
+async def main():
+    p = argparse.ArgumentParser(description="Eslatma to'lqinida Sheets so'rovlari")
+    p.add_argument("--drivers", type=int, default=300)
+    p.add_argument("--max-taps", type=int, default=3, help="bitta haydovchi eng ko'pi bilan necha marta bosadi")
+    p.add_argument("--duration", type=float, default=5.0, help="to'lqin davomiyligi (s)")
+    p.add_argument("--latency", type=float, default=0.05, help="soxta API kechikishi (s)")
+    p.add_argument("--port", type=int, default=8084)
+    p.add_argument("--budget", type=int, default=100000, help="Sheets so'rovlari / daqiqa")
+    p.add_argument("--rate-429", type=float, default=0.0, help="soxta API 429 ulushi (0..1)")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="soxta API 503 ulushi (0..1)")
+    p.add_argument("--skip-old", action="store_true", help="eski rejimni o'lchamaslik")
+    args = p.parse_args()
+
+    api = FakeSheetsApi(latency=args.latency)
+    base = await api.start(port=args.port)
+    point_gspread_at(base)
+    os.environ["GOOGLE_CREDS_JSON"] = json.dumps(fake_service_account(base))
+
+    from app.db import database
+    from app.services import sheets_outbox
+    from app.services.sheets import SheetsConfig
+    from app.services.sheets_async import AsyncSheets
+
+    class Ctx:
+        pass
+
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(), "wave.sqlite3")
+    await database.init_db()
+    ctx = Ctx()
+    ctx.sheets = AsyncSheets(
+        SheetsConfig(sheet_id="wave"), max_workers=8, timeout=60, requests_per_min=args.budget
+    )
+
+    # har haydovchining bugungi videosi Sheets'da bor
+    for tid in range(1, args.drivers + 1):
+        await database.add_video(
+            tid, DATE, "14", f"F{tid}",
+            sheet_append=ctx.sheets.video_row(**DRIVER, kindergarten_no="14", video_link=f"L{tid}"),
+        )
+    await sheets_outbox.drain_sheets_outbox(ctx)
+    async with database.get_pool().reader() as db:
+        cur = await db.execute("SELECT telegram_id, sheet_row FROM videos")
+        video_rows = dict(await cur.fetchall())
+
+    taps = make_taps(args.drivers, args.max_taps, args.duration)
+    last = {}
+    for _, tid, action, reason in taps:
+        last[tid] = (action, reason if action == "YUBORMADIM" else last.get(tid, ("", ""))[1])
+
+    # --- eski: har bosish o'z so'rovlari bilan ---
+    async def old_tap(tid, action, reason):
+        await ctx.sheets.append_rows([ctx.sheets.reminder_event_row(**DRIVER, action=action, reason=reason)])
+        await ctx.sheets.update_cells([(video_rows[tid], 9, action)])
+        if reason:
+            await ctx.sheets.update_cells([(video_rows[tid], 10, reason)])
+
+    old_took = old_calls = 0
+    if not args.skip_old:
+        api.calls.clear()
+        t = time.perf_counter()
+        await play(taps, args.duration, old_tap)
+        old_took, old_calls = time.perf_counter() - t, sum(api.calls.values()) - api.calls["token"]
+
+    # xatolar faqat o'lchanayotgan to'lqin davomida
+    api.rate_429, api.fail_rate = args.rate_429, args.fail_rate
+
+    # --- yangi: outbox ---
+    async def new_tap(tid, action, reason):
+        event = ctx.sheets.reminder_event_row(**DRIVER, action=action, reason=reason)
+        if reason:
+            await database.save_reason(tid, DATE, reason, sheet_event=event, sheet_cells={9: action, 10: reason})
+        else:
+            await database.ensure_daily_row(tid, DATE, sheet_event=event, sheet_cells={9: action})
+
+    api.calls.clear()
+    sheets_outbox.SHEETS_OUTBOX_STATS.clear()
+    worker = asyncio.create_task(sheets_outbox.run_sheets_outbox(ctx))
+    t = time.perf_counter()
+    await play(taps, args.duration, new_tap)
+    while await database.next_sheets_outbox_due() is not None:
+        await asyncio.sleep(0.05)
+    new_took, new_calls = time.perf_counter() - t, sum(api.calls.values()) - api.calls["token"]
+    worker.cancel()
+
+    rows = api.sheets[("wave", "Logs")]
+    wrong = sum(
+        1 for tid, (action, reason) in last.items()
+        if rows[video_rows[tid] - 1][8] != action or (reason and rows[video_rows[tid] - 1][9] != reason)
+    )
+
+    print(f"Haydovchilar: {args.drivers}, bosishlar: {len(taps)}, to'lqin: {args.duration}s")
+    requests_col = "so'rovlar"
+    print(f"{'rejim':<6} {requests_col:>10} {'vaqt s':>8}")
+    if not args.skip_old:
+        print(f"{'eski':<6} {old_calls:>10} {old_took:>8.2f}")
+    print(f"{'yangi':<6} {new_calls:>10} {new_took:>8.2f}")
+    print("Outbox:", dict(sheets_outbox.SHEETS_OUTBOX_STATS))
+    print("Kvota:", ctx.sheets.quota.stats())
+    if api.errors:
+        print("Soxta xatolar:", dict(api.errors))
+    print("Noto'g'ri katakchalar:", wrong)
+
+    ctx.sheets.close()
+    await database.close_db()
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())